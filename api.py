@@ -0,0 +1,156 @@
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+import os
+import sqlite3
+import datastore
+import metrics
+import query
+import rollup
+import sketches
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Headless JSON access to the dashboard's aggregations:
+#   GET /metrics                               -> available metric names and the data range
+#   GET /metrics/<name>?start=YYYY-MM-DD&end=YYYY-MM-DD
+# With amin.db present the metrics run as SQL inside SQLite (query.Engine), so
+# the server never loads the sales frames; a snapshot-only deployment falls
+# back to datastore's process cache. Rendered bodies come from a small LRU
+# keyed by (metric, range, data generation). Every body carries an ETag;
+# a request with a matching If-None-Match gets 304 without a body.
+HOST = "127.0.0.1"
+PORT = 8600
+MAX_RESPONSES = 256
+MAX_AGE = 60
+
+logging.basicConfig(
+    filename = "log.log",
+    level = logging.INFO,
+    format = "%(asctime)s - %(levelname)s - %(message)s"
+)
+
+_lock = threading.Lock()
+_responses = OrderedDict()
+
+
+#----------------------------------------------------------responses--------------------------------
+def source():
+    """Return (cube, generation, first day, last day) for the metrics to run against."""
+    if os.path.exists(datastore.DB_PATH):
+        try:
+            engine = query.Engine(datastore.DB_PATH)
+            # An amin.db from before the derived tables were materialized is served from the frames.
+            days = engine.date_range() if engine.has_tables(rollup.TABLE, sketches.TABLE) else None
+            if days is not None:
+                return (engine, datastore.generation(datastore.DB_PATH), *days)
+        except (sqlite3.OperationalError, pd.errors.DatabaseError):
+            pass
+    frames = datastore.get_frames()
+    days = frames["sales"]["event_date"]
+    return frames["rollup"], frames["generation"], days.min(), days.max()
+
+
+def _date_range(first, last, query):
+    start = pd.to_datetime(query.get("start", [first])[0]).date()
+    end = pd.to_datetime(query.get("end", [last])[0]).date()
+    if start > end:
+        raise ValueError("start is after end")
+    return start, end
+
+
+def render(name, query):
+    """Return (body, etag) for a metric, from the response cache when the inputs are unchanged."""
+    cube, generation, first, last = source()
+    start, end = _date_range(first, last, query)
+    key = (name, str(start), str(end), generation)
+    with _lock:
+        cached = _responses.get(key)
+        if cached is not None:
+            _responses.move_to_end(key)
+            return cached
+    table = metrics.METRICS[name](cube, start, end)
+    payload = {
+        "metric": name,
+        "start": str(start),
+        "end": str(end),
+        "generation": str(generation[1]),
+        "rows": json.loads(table.to_json(orient = "records", date_format = "iso")),
+    }
+    body = json.dumps(payload).encode()
+    response = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+    with _lock:
+        _responses[key] = response
+        while len(_responses) > MAX_RESPONSES:
+            _responses.popitem(last = False)
+    return response
+
+
+def index():
+    _, generation, first, last = source()
+    body = json.dumps({
+        "metrics": sorted(metrics.METRICS),
+        "start": str(first.date()),
+        "end": str(last.date()),
+        "generation": str(generation[1]),
+    }).encode()
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+#----------------------------------------------------------server--------------------------------
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            if parts == ["metrics"]:
+                body, etag = index()
+            elif len(parts) == 2 and parts[0] == "metrics" and parts[1] in metrics.METRICS:
+                body, etag = render(parts[1], parse_qs(url.query))
+            else:
+                return self._send(404, json.dumps({"error": "unknown metric"}).encode())
+        except ValueError as e:
+            return self._send(400, json.dumps({"error": str(e)}).encode())
+        except Exception:
+            logging.exception("An error occured serving %s", self.path)
+            return self._send(500, json.dumps({"error": "internal error"}).encode())
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, None, etag)
+        self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"max-age={MAX_AGE}")
+        self.send_header("Content-Length", str(len(body) if body else 0))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.info("api %s - %s", self.address_string(), format % args)
+
+
+def serve(host=HOST, port=PORT):
+    server = ThreadingHTTPServer((host, port), Handler)
+    logging.info("Metrics API listening on http://%s:%s/metrics", host, port)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Serve the dashboard metrics as JSON")
+    parser.add_argument("--host", default = HOST)
+    parser.add_argument("--port", type = int, default = PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -0,0 +1,497 @@
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import pandas as pd
+import cohorts
+import normalize
+import sketches
+import synthetic
+import timeseries
+import transform
+
+
+#----------------------------------------------------------helpers--------------------------------
+def timeit(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def status(field):
+    """A /proc/self/status memory field (VmRSS:, VmHWM:) in kB; Linux only."""
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+
+#--------------------------------------melt/merge reference (previous dashboard path)------------------------------------
+def legacy_explode(df):
+    id_vars = transform.ID_VARS
+    item_name = df.melt(id_vars = id_vars, value_vars = [f"item_name_{i}" for i in range(5)], value_name = "Product_name", var_name = "in")
+    item_price = df.melt(id_vars = id_vars, value_vars = [f"price_{i}" for i in range(5)], value_name = "Price", var_name = "ip")
+    item_quantity = df.melt(id_vars = id_vars, value_vars = [f"quantity_{i}" for i in range(5)], value_name = "Quantity", var_name = "iq")
+    item_variant = df.melt(id_vars = id_vars, value_vars = [f"item_variant_{i}" for i in range(5)], value_name = "Item_variant", var_name = "iv")
+
+    item_name["product_no"]    = item_name["in"].str.extract(r"(\d+)")
+    item_price["product_no"]   = item_price["ip"].str.extract(r"(\d+)")
+    item_quantity["product_no"]= item_quantity["iq"].str.extract(r"(\d+)")
+    item_variant["product_no"] = item_variant["iv"].str.extract(r"(\d+)")
+
+    merged = (
+        item_name.drop(columns=["in"])
+        .merge(item_price.drop(columns=["ip"]), on=id_vars + ["product_no"])
+        .merge(item_quantity.drop(columns=["iq"]), on=id_vars + ["product_no"])
+        .merge(item_variant.drop(columns=["iv"]), on=id_vars + ["product_no"])
+    )
+    merged["Revenue"] = merged["Price"] * merged["Quantity"]
+    return merged
+
+
+def check_explode(df):
+    """Assert explode_items matches the melt/merge path once its empty slots are dropped."""
+    expected = legacy_explode(df).dropna(subset=["Product_name"])
+    expected["product_no"] = expected["product_no"].astype("int8")
+    actual = transform.explode_items(df)
+    keys = ["user_pseudo_id", "new_event_timestamp", "product_no"]
+    expected = expected.sort_values(keys).reset_index(drop=True)
+    actual = actual.sort_values(keys).reset_index(drop=True)[expected.columns]
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def bench_explode(sizes):
+    print(f"{'orders':>10} {'melt/merge s':>14} {'explode_items s':>16} {'speedup':>8}")
+    for n in sizes:
+        df = transform.clean_sales(synthetic.synthetic_sales(n))
+        check_explode(df)
+        legacy, _ = timeit(legacy_explode, df)
+        fast, _ = timeit(transform.explode_items, df)
+        print(f"{n:>10} {legacy:>14.3f} {fast:>16.3f} {legacy / fast:>7.1f}x")
+
+
+#--------------------------------------normalization: apply chains vs rules engine------------------------------------
+def legacy_normalize(df):
+    cleaned_city = df["city"].str.lower().str.strip()
+    cleaned_city = cleaned_city.apply(lambda x: "bangalore" if pd.notna(x) and x.startswith("ben") else x)
+    cleaned_city = cleaned_city.apply(lambda x: "bangalore" if pd.notna(x) and x.startswith("ban") else x)
+    cleaned_city = cleaned_city.apply(lambda x: "bangalore" if pd.notna(x) and x.endswith(("lore", "luru")) else x)
+    cleaned_city = cleaned_city.fillna("bangalore")
+    source = df["source_origin"]
+    for needle, value in [("direct", "direct"), ("insta", "instagram"), ("fb", "facebook"), ("yahoo", "yahoo"),
+                          ("youtube", "youtube"), ("chatgpt", "chatgpt"), ("google", "google"), ("bing", "bing"),
+                          ("cdn", "cdn"), ("duck", "duckduckgo"), ("available", "others")]:
+        source = source.apply(lambda x: value if needle in str(x).lower().strip() else x)
+    return cleaned_city, source
+
+
+def rules_normalize(df):
+    rules = normalize.load_rules()
+    return tuple(normalize.normalize(df[rules[name]["column"]], rules[name]) for name in ["cleaned_city", "source_origin"])
+
+
+def bench_normalize(sizes):
+    print(f"{'orders':>10} {'apply chain s':>14} {'rules engine s':>15} {'speedup':>8}")
+    for n in sizes:
+        df = synthetic.synthetic_sales(n)
+        for expected, actual in zip(legacy_normalize(df), rules_normalize(df)):
+            pd.testing.assert_series_equal(actual, expected, check_dtype=False, check_names=False)
+        legacy, _ = timeit(legacy_normalize, df)
+        fast, _ = timeit(rules_normalize, df)
+        print(f"{n:>10} {legacy:>14.3f} {fast:>15.3f} {legacy / fast:>7.1f}x")
+
+
+#--------------------------------------ingestion: full refresh vs incremental------------------------------------
+def bench_ingestion(n, new_days=1):
+    """Full-load n orders through a fake BigQuery client, then append new_days and load incrementally."""
+    sales = synthetic.synthetic_sales(n, end="2025-08-14")
+    fresh = synthetic.synthetic_sales(max(n // 200, 1), seed=1, start="2025-08-14", end=str(pd.Timestamp("2025-08-14") + pd.Timedelta(days=new_days)))
+    first_visit = synthetic.synthetic_first_visit(sales)
+    os.chdir(tempfile.mkdtemp())
+    import ingestion
+
+    client = synthetic.FakeBigQueryClient({"t_total_sales": sales, "t_first_visit": first_visit})
+    start = time.perf_counter()
+    ingestion.main(full=True, client=client)
+    full = time.perf_counter() - start
+
+    client.tables["t_total_sales"] = pd.concat([sales, fresh], ignore_index=True)
+    start = time.perf_counter()
+    ingestion.main(client=client)
+    incremental = time.perf_counter() - start
+
+    con = sqlite3.connect("amin.db")
+    counts = con.execute("select (select count(*) from sales), (select count(*) from sales_items)").fetchone()
+    con.close()
+    expected = transform.explode_items(transform.clean_sales(client.tables["t_total_sales"].copy()))
+    assert counts == (len(client.tables["t_total_sales"]), len(expected)), counts
+    print(f"ingestion of {n} orders: full {full:.2f}s, incremental (+{len(fresh)} orders) {incremental:.2f}s")
+
+
+#--------------------------------------cold load: SQLite vs columnar snapshot------------------------------------
+# VmHWM (peak RSS of this process image) rather than ru_maxrss, which a child
+# inherits from the forking parent on Linux.
+COLD_LOAD = """
+import sys, time
+sys.path.insert(0, {repo!r})
+import datastore, snapshot
+def status(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+base = status("VmRSS:")
+start = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - start
+print(elapsed, (status("VmHWM:") - base) / 1024)
+"""
+
+
+def cold_load(load):
+    # A fresh interpreter per measurement, so neither path benefits from the other's warm imports.
+    code = COLD_LOAD.format(repo=os.path.dirname(os.path.abspath(__file__)), load=load)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+    return float(output[-2]), float(output[-1])
+
+
+def bench_snapshot(n):
+    """Cold load time and RSS growth of the SQLite path against Parquet and Arrow IPC snapshots (Linux only)."""
+    sales = synthetic.synthetic_sales(n)
+    os.chdir(tempfile.mkdtemp())
+    import ingestion
+    import snapshot
+    ingestion.main(full=True, client=synthetic.FakeBigQueryClient({"t_total_sales": sales, "t_first_visit": synthetic.synthetic_first_visit(sales)}))
+    con = sqlite3.connect("amin.db")
+    print(f"cold load of {n} orders: {'source':>10} {'seconds':>8} {'RSS MB':>8}")
+    seconds, rss = cold_load("datastore._load('amin.db')")
+    print(f"{'':>27}{'sqlite':>10} {seconds:>8.2f} {rss:>8.0f}")
+    for format in snapshot.FORMATS:
+        snapshot.write_snapshot(con, "bench", directory=format, format=format)
+        seconds, rss = cold_load(f"datastore._load_snapshot({format!r}, snapshot.read_manifest({format!r}))")
+        print(f"{'':>27}{format:>10} {seconds:>8.2f} {rss:>8.0f}")
+    con.close()
+
+
+#--------------------------------------decomposition: statsmodels vs timeseries------------------------------------
+def bench_timeseries(days=(365, 3650), new_days=1):
+    import numpy as np
+    from statsmodels.tsa.seasonal import seasonal_decompose
+    print(f"{'days':>10} {'statsmodels s':>14} {'fit s':>10} {'update s':>10} {'forecast s':>11}")
+    for n in days:
+        rng = np.random.default_rng(0)
+        steps = np.arange(n)
+        series = pd.Series(
+            20_000 + 5 * steps + 3_000 * np.sin(2 * np.pi * steps / 7) + rng.normal(0, 2_000, n),
+            index=pd.date_range("2020-01-01", periods=n, freq="D"),
+        )
+        reference = seasonal_decompose(series, model="additive", period=timeseries.PERIOD)
+        full = timeseries.fit(series)
+        for part in ["trend", "seasonal", "resid"]:
+            np.testing.assert_allclose(full[part], getattr(reference, part).to_numpy())
+        # Revise the last day and append new ones, as an incremental ingestion would.
+        history = timeseries.fit(series.iloc[:n - new_days])
+        revised = series.copy()
+        revised.iloc[n - new_days - 1] += 1_000
+        updated = timeseries.update(history, revised)
+        for part in ["trend", "seasonal", "resid"]:
+            np.testing.assert_allclose(updated[part], timeseries.fit(revised)[part])
+        legacy, _ = timeit(seasonal_decompose, series, "additive", None, timeseries.PERIOD)
+        fit, _ = timeit(timeseries.fit, series)
+        update, _ = timeit(timeseries.update, history, revised)
+        ahead, _ = timeit(timeseries.forecast, full, 30)
+        print(f"{n:>10} {legacy:>14.4f} {fit:>10.4f} {update:>10.4f} {ahead:>11.4f}")
+
+
+#--------------------------------------cohorts: visitor/purchase join at scale------------------------------------
+def bench_cohorts(visitors, orders_per_visitor=0.3):
+    import numpy as np
+    rng = np.random.default_rng(0)
+    ids = np.char.add(np.arange(visitors).astype(str), ".1700000000")
+    first = pd.Series(pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 540, visitors), unit="D"))
+    buyers = rng.choice(visitors, int(visitors * orders_per_visitor))
+    sales = pd.DataFrame({
+        "user_pseudo_id": pd.Categorical(ids[buyers]),
+        "event_date": first.to_numpy()[buyers] + pd.to_timedelta(rng.integers(0, 90, len(buyers)), unit="D").to_numpy(),
+    })
+    visits = pd.DataFrame({"user_pseudo_id": ids, "first_visit": first})
+    prepare, joined = timeit(cohorts.prepare, visits, sales, repeat=1)
+    analyse, result = timeit(cohorts.analyse, joined, "2024-01-01", "2025-06-30")
+    print(f"cohorts: {visitors:,} visitors, {len(sales):,} orders: join {prepare:.2f}s (once per generation), "
+          f"range analysis {analyse:.2f}s, {len(result['cohorts'])} weekly cohorts")
+
+
+#--------------------------------------aggregation: SQL pushdown vs pandas------------------------------------
+def pandas_city(db_path, start, end):
+    # The previous dashboard path: read all of sales, clean it, then mask and group.
+    con = sqlite3.connect(db_path)
+    sales = transform.clean_sales(pd.read_sql("select * from sales", con))
+    con.close()
+    sales = sales[(sales["event_date"] >= start) & (sales["event_date"] <= end)]
+    return sales.groupby("cleaned_city")["subtotal"].agg(orders="size", subtotal="sum")
+
+
+def pandas_variants(db_path, start, end):
+    con = sqlite3.connect(db_path)
+    items = pd.read_sql("select * from sales_items", con, parse_dates=["event_date"])
+    con.close()
+    items = items[(items["event_date"] >= start) & (items["event_date"] <= end)]
+    order = (items["user_pseudo_id"] + "|" + items["new_event_timestamp"]).rename("order")
+    return items.assign(order=order).groupby("Item_variant").agg(revenue=("Revenue", "sum"), orders=("order", "nunique"))
+
+
+def bench_pushdown(sizes, days=30):
+    """City AOV and revenue per variant over the last `days` days: full load + pandas against query.Engine."""
+    import ingestion
+    import query
+    print(f"{'orders':>10} {'aggregation':<14} {'pandas s':>9} {'pushdown s':>11} {'speedup':>8}")
+    for n in sizes:
+        db_path = os.path.join(tempfile.mkdtemp(), "amin.db")
+        con = sqlite3.connect(db_path)
+        synthetic.synthetic_sales(n).to_sql("sales", con, index=False, chunksize=50_000)
+        ingestion.transform_sales(con)
+        con.commit()
+        con.close()
+        engine = query.Engine(db_path)
+        first, last = engine.date_range()
+        start = last - pd.Timedelta(days=days - 1)
+
+        legacy, expected = timeit(pandas_city, db_path, start, last, repeat=1)
+        pushdown, city = timeit(engine.query, "city", start, last)
+        city = city.set_index("member")
+        assert (city["orders"] == expected["orders"]).all() and ((city["subtotal"] - expected["subtotal"]).abs() < 1e-6 * expected["subtotal"].abs().max()).all()
+        print(f"{n:>10} {'city':<14} {legacy:>9.3f} {pushdown:>11.4f} {legacy / pushdown:>7.0f}x")
+
+        legacy, expected = timeit(pandas_variants, db_path, start, last, repeat=1)
+        pushdown, variants = timeit(engine.line_items, "Item_variant", start, last, ("revenue", "orders"))
+        variants = variants.set_index("Item_variant")
+        assert ((variants["revenue"] - expected["revenue"]).abs() < 1e-6 * expected["revenue"].abs().max()).all()
+        assert (variants["orders"] == expected["orders"]).all()
+        print(f"{n:>10} {'item_variant':<14} {legacy:>9.3f} {pushdown:>11.4f} {legacy / pushdown:>7.0f}x")
+        query.reset_pools()
+
+
+#--------------------------------------pincode x product: groupby vs sparse matrix------------------------------------
+def bench_matrix(sizes):
+    """Per-pincode totals and top product over a 30-day and the full window: row groupby against matrix.py."""
+    import numpy as np
+    import geo
+    import matrix
+    import schema
+    store = geo.Store(np.arange(560000, 560200), np.full(200, 12.97), np.full(200, 77.59))
+    print(f"{'orders':>10} {'window':>8} {'groupby s':>10} {'matrix s':>9} {'speedup':>8}   build s")
+    for n in sizes:
+        items, _ = schema.compact(transform.build_items(transform.clean_sales(synthetic.synthetic_sales(n))))
+        build, sold = timeit(matrix.build, items, repeat=1)
+        end = items["event_date"].max()
+        for days in (30, None):
+            start = items["event_date"].min() if days is None else end - pd.Timedelta(days=days - 1)
+            window = items[(items["event_date"] >= start) & (items["event_date"] <= end)]
+            legacy, expected = timeit(geo.pincode_points, window, store)
+            fast, points = timeit(lambda: geo.place(matrix.pincode_top(sold, start, end), store))
+            expected, points = expected.sort_values("pincode"), points.sort_values("pincode")
+            assert np.allclose(expected["Revenue"], points["Revenue"], rtol=1e-5) and np.allclose(expected["Quantity"], points["Quantity"])
+            print(f"{n:>10} {days or 'all':>8} {legacy:>10.4f} {fast:>9.4f} {legacy / fast:>7.1f}x   {build:.2f}")
+
+
+#--------------------------------------distinct buyers and quantiles: exact vs sketches------------------------------------
+def bench_sketches(sizes, days=(1, 30, None)):
+    """Buyers and median/p90 order value per city: exact nunique/quantile against merged daily sketches."""
+    import numpy as np
+    import schema
+    print(f"{'orders':>10} {'window':>7} {'exact s':>8} {'sketch s':>9} {'buyers err':>11} {'p50 err':>8} {'p90 err':>8}   build s")
+    for n in sizes:
+        sales, _ = schema.compact(transform.clean_sales(synthetic.synthetic_sales(n)))
+        build, sketch = timeit(sketches.build_sketches, sales, repeat=1)
+        indexed = sketches.index_sketches(sketch)
+        end = sales["event_date"].max()
+        for window in days:
+            start = sales["event_date"].min() if window is None else end - pd.Timedelta(days=window - 1)
+            orders = sales[(sales["event_date"] >= start) & (sales["event_date"] <= end)]
+
+            def exact():
+                grouped = orders.groupby("cleaned_city", observed=True)
+                return grouped["user_pseudo_id"].nunique(), grouped["subtotal"].quantile([0.5, 0.9]).unstack()
+
+            def sketched():
+                rows = sketches.window(indexed, "city", "dd", start, end)
+                return sketches.distinct(sketches.window(indexed, "city", "hll", start, end)), sketches.quantiles(rows, [0.5, 0.9])
+
+            slow, (buyers, spread) = timeit(exact)
+            fast, (estimate, estimated) = timeit(sketched)
+            buyers.index, spread.index = buyers.index.astype(str), spread.index.astype(str)
+            err = lambda a, b: float(np.nanmax(np.abs(a.reindex(b.index) / b - 1)))
+            print(f"{n:>10} {window or 'all':>7} {slow:>8.4f} {fast:>9.4f} {err(estimate, buyers):>10.1%} "
+                  f"{err(estimated[0.5], spread[0.5]):>7.1%} {err(estimated[0.9], spread[0.9]):>7.1%}   {build:.2f}")
+
+
+#--------------------------------------stage suite with a JSON baseline------------------------------------
+# Every pipeline stage on synthetic GA4-shaped data, timed and with its peak
+# memory, so that two runs (or a run and a saved baseline) can be compared.
+# 10M orders needs roughly 30 GB of RAM for the generator alone.
+SUITE_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+# Stages faster than this are reported but never flagged as regressions.
+NOISE_SECONDS = 0.01
+
+
+def _reset_peak():
+    # Writing 5 to clear_refs resets VmHWM (Linux); elsewhere fall back to tracemalloc.
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return status("VmRSS:")
+    except OSError:
+        import tracemalloc
+        tracemalloc.start()
+        return None
+
+
+def _peak_mb(base):
+    if base is not None:
+        return (status("VmHWM:") - base) / 1024
+    import tracemalloc
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def measure(results, stage, func, *args):
+    base = _reset_peak()
+    start = time.perf_counter()
+    value = func(*args)
+    results[stage] = {"seconds": round(time.perf_counter() - start, 4), "peak_mb": round(_peak_mb(base), 1)}
+    return value
+
+
+def run_suite(n):
+    """Time each stage for n synthetic orders; returns {stage: {seconds, peak_mb}}."""
+    import datastore
+    import metrics
+    import rollup
+    import schema
+    results = {}
+    raw = measure(results, "generate", synthetic.synthetic_sales, n)
+    visits = synthetic.synthetic_first_visit(raw)
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "amin.db")
+
+    def write():
+        con = sqlite3.connect(db_path)
+        raw.to_sql("sales", con, index=False, chunksize=50_000)
+        visits.to_sql("first_visit", con, index=False, chunksize=50_000)
+        con.commit()
+        return con
+    con = measure(results, "write_sqlite", write)
+    try:
+        import ingestion
+        measure(results, "derive_tables", ingestion.transform_sales, con)
+        con.commit()
+    except ImportError:
+        print("  derive_tables skipped: ingestion needs google-cloud-bigquery; load derives in process")
+    con.close()
+    measure(results, "load", datastore._load, db_path)
+
+    sales = measure(results, "clean", transform.clean_sales, raw.copy())
+    items = measure(results, "explode", transform.build_items, sales)
+    daily = measure(results, "rollup", rollup.build_rollup, sales, items)
+    sales, _ = measure(results, "compact", schema.compact, sales)
+    cube = measure(results, "index_rollup", rollup.index_rollup, daily)
+    sketch = measure(results, "build_sketches", sketches.build_sketches, sales)
+    cube[sketches.TABLE] = measure(results, "index_sketches", sketches.index_sketches, sketch)
+    start, end = sales["event_date"].min(), sales["event_date"].max()
+    for name, metric in metrics.METRICS.items():
+        measure(results, f"metric:{name}", metric, cube, start, end)
+    series = timeseries.daily_series(cube)
+    measure(results, "decomposition", timeseries.fit, series)
+    visits = visits.assign(first_visit=pd.to_datetime(visits["event_date"]))
+    joined = measure(results, "cohort_join", cohorts.prepare, visits, sales)
+    measure(results, "cohort_analysis", cohorts.analyse, joined, start, end)
+    return results
+
+
+def environment():
+    import platform
+    import numpy as np
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(baseline, current, tolerance):
+    """Print current against baseline per size and stage; return the number of regressions."""
+    regressions = 0
+    print(f"{'orders':>10} {'stage':<26} {'base s':>9} {'now s':>9} {'ratio':>7} {'base MB':>8} {'now MB':>8}")
+    for size, stages in current["runs"].items():
+        for stage, now in stages.items():
+            base = baseline["runs"].get(size, {}).get(stage)
+            if base is None:
+                print(f"{size:>10} {stage:<26} {'-':>9} {now['seconds']:>9.4f}")
+                continue
+            ratio = now["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+            slower = ratio > tolerance and now["seconds"] > NOISE_SECONDS
+            regressions += slower
+            print(f"{size:>10} {stage:<26} {base['seconds']:>9.4f} {now['seconds']:>9.4f} {ratio:>6.2f}x "
+                  f"{base['peak_mb']:>8.1f} {now['peak_mb']:>8.1f}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def bench_suite(sizes, save=None, against=None, tolerance=1.25):
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "environment": environment(), "runs": {}}
+    for n in sizes:
+        print(f"suite: {n} orders")
+        report["runs"][str(n)] = run_suite(n)
+    if save:
+        with open(save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved {save}")
+    if against:
+        with open(against) as f:
+            baseline = json.load(f)
+        return compare(baseline, report, tolerance)
+    compare({"runs": {}}, report, tolerance)
+    return 0
+
+
+# ----------------------------------------------------main function -----------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the dashboard data pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--ingestion", action="store_true", help="also time full vs incremental ingestion (needs google-cloud-bigquery)")
+    parser.add_argument("--snapshot", action="store_true", help="also compare cold loads from SQLite and the columnar snapshots")
+    parser.add_argument("--cohorts", type=int, metavar="VISITORS", help="also time the cohort analysis for this many visitors")
+    parser.add_argument("--pushdown", action="store_true", help="also compare SQL pushdown aggregations with loading the tables into pandas")
+    parser.add_argument("--matrix", action="store_true", help="also compare the pincode x product groupby with the sparse matrix")
+    parser.add_argument("--sketches", action="store_true", help="also compare exact distinct buyers and quantiles with the daily sketches")
+    parser.add_argument("--suite", action="store_true", help=f"time every pipeline stage at --sizes (e.g. {' '.join(map(str, SUITE_SIZES))}) instead")
+    parser.add_argument("--save", metavar="JSON", help="with --suite: write the timings as a baseline file")
+    parser.add_argument("--compare", metavar="JSON", help="with --suite: compare against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+    if args.suite:
+        sys.exit(1 if bench_suite(args.sizes, args.save, args.compare, args.tolerance) else 0)
+    bench_explode(args.sizes)
+    bench_normalize(args.sizes)
+    bench_timeseries()
+    if args.ingestion:
+        bench_ingestion(max(args.sizes))
+    if args.snapshot:
+        bench_snapshot(max(args.sizes))
+    if args.cohorts:
+        bench_cohorts(args.cohorts)
+    if args.pushdown:
+        bench_pushdown(args.sizes)
+    if args.matrix:
+        bench_matrix(args.sizes)
+    if args.sketches:
+        bench_sketches(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import os
+import re
+from functools import lru_cache
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Product name -> category for the revenue treemap. The catalogue in
+# collections.csv gives every listed product its collection's category;
+# OVERRIDES covers products filed under a broader collection and products the
+# catalogue does not list (hampers, accessories, seasonal specials).
+COLLECTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "collections.csv")
+COLLECTION_CATEGORY = {
+    "Artisanal bites": "Cookies & Biscuits",
+    "Boulangerie and Viennoiserie": "Breads",
+    "Cake Loaves": "Cakes & Loaves",
+    "Celebration Cakes": "Cakes & Loaves",
+    "Cookies & Biscuits": "Cookies & Biscuits",
+}
+# Keys are matched through product_key(), so casing and "(Eggless)"/"(Vegan)"
+# spellings need no entries of their own.
+OVERRIDES = {
+    "Balloon pump": "Accessories",
+    "Birthday Balloons (Pack Of 15)": "Accessories",
+    "Birthday Banner": "Accessories",
+    "Cake Toppers": "Accessories",
+    "Candles": "Accessories",
+    "Split delivery": "Accessories",
+
+    "Autumn Serenade": "Artistic Specials",
+    "Blush": "Artistic Specials",
+    "Golden Hour": "Artistic Specials",
+    "Mauve Season": "Artistic Specials",
+    "Scarlett Whim": "Artistic Specials",
+    "Sun Drenched": "Artistic Specials",
+
+    "Coffee": "Beverages & Jars",
+    "Honey Mixed Dry Fruit Jar": "Beverages & Jars",
+    "Hot Chocolate Powder": "Beverages & Jars",
+
+    "Almond Rocks": "Brownies & Blondies",
+    "Chocolate Fudge Brownie": "Brownies & Blondies",
+    "Double Chocolate Walnut Brownie": "Brownies & Blondies",
+    "Double Chocolate With Caramelised Pistachio": "Brownies & Blondies",
+    "Gluten Free Chocolate Fudge Brownie": "Brownies & Blondies",
+    "Nutella Brownie": "Brownies & Blondies",
+    "Pistachio Blondie": "Brownies & Blondies",
+
+    "La Vie En Rose": "Cakes & Loaves",
+    "Mango And Cashew Entremet": "Cakes & Loaves",
+    "Mango Cheesecake": "Cakes & Loaves",
+    "Mango Pull Up Cake": "Cakes & Loaves",
+    "Mango Tres Leches Dapper": "Cakes & Loaves",
+    "Peaches & Cream": "Cakes & Loaves",
+    "Red Velvet": "Cakes & Loaves",
+    "The Rakhi cake (Saffron Rasmalai eggless)": "Cakes & Loaves",
+
+    "Bagels": "Cookies & Biscuits",
+    "Box Of 4": "Cookies & Biscuits",
+    "Croissants": "Cookies & Biscuits",
+    "Eggless Croissant": "Cookies & Biscuits",
+    "Red velvet Cream Cheese cookies": "Cookies & Biscuits",
+
+    "BESTSELLER PACK OF 2": "Hampers & Specials",
+    "Hamper : Decadent": "Hampers & Specials",
+    "Hamper : Indulgent": "Hampers & Specials",
+    "Hamper : Luxurious": "Hampers & Specials",
+    "Hamper : Sumptuous": "Hampers & Specials",
+    "Rakhi special : Blooms Before Bickering": "Hampers & Specials",
+    "Valentine's Hamper: Adore": "Hampers & Specials",
+}
+
+VARIANT = re.compile(r"\s*\((?:eggless|vegan)\)\s*$")
+SPACES = re.compile(r"\s+")
+
+
+#----------------------------------------------------------index--------------------------------
+def product_key(name):
+    """Lookup key for a product name: lower case, single spaces, no (Eggless)/(Vegan) suffix."""
+    return SPACES.sub(" ", VARIANT.sub("", str(name).strip().lower())).strip()
+
+
+@lru_cache(maxsize=None)
+def load_index(path=COLLECTIONS_PATH):
+    """Build the product_key -> category index once from the catalogue plus OVERRIDES."""
+    index = {}
+    try:
+        catalogue = pd.read_csv(path)
+        for product, collection in zip(catalogue["Product"], catalogue["Collections"]):
+            if collection in COLLECTION_CATEGORY:
+                index[product_key(product)] = COLLECTION_CATEGORY[collection]
+    except FileNotFoundError:
+        pass
+    index.update({product_key(product): category for product, category in OVERRIDES.items()})
+    return index
+
+
+#----------------------------------------------------------resolving--------------------------------
+def _resolve(names, index):
+    # Resolve each distinct name once and broadcast the result through the codes.
+    names = pd.Series(names)
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        codes, uniques = names.cat.codes.to_numpy(), names.cat.categories
+    else:
+        codes, uniques = pd.factorize(names)
+    resolved = pd.Categorical([index.get(product_key(name)) for name in uniques])
+    return names, pd.Series(resolved.take(codes, allow_fill=True), index=names.index)
+
+
+def categorize(names, index=None):
+    """Return the category of each product name as a categorical; unmapped names are NaN."""
+    return _resolve(names, index or load_index())[1]
+
+
+def unmapped(names, index=None):
+    """Distinct product names the index cannot place, most frequent first."""
+    names, resolved = _resolve(names, index or load_index())
+    missing = names[resolved.isna() & names.notna()]
+    return missing.astype(str).value_counts()
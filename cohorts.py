@@ -0,0 +1,125 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Visitor cohorts from first_visit joined to purchases in sales on
+# user_pseudo_id. Users become integer codes and days integer day numbers once
+# per data generation; every measure is then a vectorised group-by or unique
+# over those arrays. A purchase counts from the day of the visitor's first
+# visit onwards.
+# Cohorts are the Monday-starting week of the first visit; a cohort belongs to
+# the selected range when its first visit falls inside it.
+RETENTION_WEEKS = 12
+# Days from first visit to first purchase, as [lower, upper) bins.
+DELAY_BINS = [0, 1, 2, 4, 8, 15, 31, np.inf]
+DELAY_LABELS = ["same day", "1 day", "2-3 days", "4-7 days", "8-14 days", "15-30 days", "31+ days"]
+MAX_RESULTS = 32
+
+_lock = threading.Lock()
+_results = OrderedDict()
+
+
+#----------------------------------------------------------joining--------------------------------
+def _days(values):
+    return np.asarray(values, dtype="datetime64[D]").astype(np.int64)
+
+
+def _week(days):
+    # Day 0 (1970-01-01) is a Thursday; weeks are numbered from Monday 1969-12-29.
+    return (days + 3) // 7
+
+
+def _week_start(weeks):
+    return pd.to_datetime(weeks * 7 - 3, unit="D")
+
+
+def prepare(visits, sales):
+    """Integer form of the visitor/purchase join; independent of the date range.
+
+    Returns each visitor's first-visit day number, and the visitor code and
+    day number of every order placed on or after that visitor's first visit.
+    """
+    index = pd.Index(visits["user_pseudo_id"])
+    users = sales["user_pseudo_id"]
+    if isinstance(users.dtype, pd.CategoricalDtype):
+        # Look up each distinct id once and broadcast through the codes.
+        lookup = np.append(index.get_indexer(users.cat.categories), -1)
+        codes = lookup[users.cat.codes.to_numpy()]
+    else:
+        codes = index.get_indexer(users)
+    first = _days(visits["first_visit"])
+    days = _days(sales["event_date"])
+    known = codes >= 0
+    codes, days = codes[known], days[known]
+    after = days >= first[codes]
+    return {"first": first, "user": codes[after], "day": days[after]}
+
+
+#----------------------------------------------------------measures--------------------------------
+def analyse(joined, start, end, weeks=RETENTION_WEEKS):
+    """Funnel, time-to-first-purchase, weekly cohorts and retention for visitors first seen in [start, end]."""
+    first = joined["first"]
+    lo, hi = _days([pd.to_datetime(start)])[0], _days([pd.to_datetime(end)])[0]
+    in_range = (first >= lo) & (first <= hi)
+    keep = in_range[joined["user"]]
+    user, day = joined["user"][keep], joined["day"][keep]
+
+    per_user = pd.DataFrame({"user": user, "day": day}).groupby("user")["day"].agg(["min", "size"])
+    delay = pd.Series(per_user["min"].to_numpy() - first[per_user.index.to_numpy()])
+    delays = pd.cut(delay, DELAY_BINS, right=False, labels=DELAY_LABELS).value_counts(sort=False).rename_axis("delay").reset_index(name="users")
+
+    funnel = pd.DataFrame({
+        "stage": ["Visitors", "Purchasers", "Repeat purchasers"],
+        "users": [int(in_range.sum()), len(per_user), int((per_user["size"] > 1).sum())],
+    })
+
+    cohort_of = _week(first)
+    sizes = pd.Series(cohort_of[in_range]).value_counts().sort_index()
+    buyers = pd.Series(cohort_of[per_user.index.to_numpy()]).value_counts()
+    cohorts = pd.DataFrame({"visitors": sizes, "purchasers": buyers.reindex(sizes.index, fill_value=0)})
+    cohorts["conversion"] = cohorts["purchasers"] / cohorts["visitors"]
+
+    # Distinct (user, week offset) pairs, counted per cohort and offset.
+    offset = _week(day) - cohort_of[user]
+    within = offset < weeks
+    pairs = np.unique(user[within] * weeks + offset[within])
+    active = pd.DataFrame({"cohort": cohort_of[pairs // weeks], "offset": pairs % weeks})
+    counts = active.groupby(["cohort", "offset"]).size().unstack(fill_value=0)
+    retention = counts.reindex(index=cohorts.index, columns=range(weeks), fill_value=0).div(cohorts["visitors"], axis=0)
+    retention.index = _week_start(retention.index.to_numpy())
+    retention.index.name, retention.columns.name = "cohort", "week"
+    cohorts.index = _week_start(cohorts.index.to_numpy())
+
+    return {
+        "funnel": funnel,
+        "delays": delays,
+        "median_days": float(delay.median()) if len(delay) else None,
+        "cohorts": cohorts.rename_axis("cohort").reset_index(),
+        "retention": retention,
+    }
+
+
+def cached_analysis(visits, sales, start, end, generation):
+    """analyse(), memoised per date range and data generation; the join is memoised per generation."""
+    key = (str(start), str(end), generation)
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+        joined = _results.get(("joined", generation))
+    if joined is None:
+        joined = prepare(visits, sales)
+    result = analyse(joined, start, end)
+    with _lock:
+        # Only the latest generation's join is kept.
+        for stale in [k for k in _results if k[0] == "joined" and k[1] != generation]:
+            del _results[stale]
+        _results[("joined", generation)] = joined
+        _results[key] = result
+        _results.move_to_end(("joined", generation))
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
+    return result
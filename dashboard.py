@@ -1,13 +1,29 @@
+import time
+started = time.perf_counter()
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import warnings 
 import pathlib 
-import sqlite3
+import os
+import categories
+import cohorts
+import datastore
+import downsample
+import explorer
+import figcache
+import geo
+import instrument
+import matrix
+import metrics
+import sections
+import timeseries
 
 warnings.filterwarnings("ignore")
-con = sqlite3.connect('amin.db')
-df = pd.read_sql("select * from sales", con)
+# Every instrumented stage of this run, for the debug panel.
+instrument.start_recording()
+frames = datastore.get_frames()
+df = frames["sales"]
 # pd.set_option('display.max_rows', None)
 pd.set_option('display.float_format', '{:,.0f}'.format)
 
@@ -15,6 +31,8 @@ pd.set_option('display.float_format', '{:,.0f}'.format)
 
 #------------------------------------------------------SETUP----------------------------------------------------------------
 st.set_page_config(layout="wide")
+# Sections render inside expanders and only compute while open.
+page = sections.Sections(started)
 
 
 def css(path):
@@ -67,76 +85,10 @@ The main goal of this analysis is to:
 
 
 
-#----------------------------------------------------cleaning-------------------------------------------------------
-df["cleaned_city"] = df["city"].str.lower().str.strip()
-df["cleaned_city"] = df["cleaned_city"].apply(lambda x: "bangalore" if pd.notna(x) and x.startswith("ben") else x)
-df["cleaned_city"] = df["cleaned_city"].apply(lambda x: "bangalore" if pd.notna(x) and x.startswith("ban") else x)
-df["cleaned_city"] = df["cleaned_city"].apply(lambda x: "bangalore" if pd.notna(x) and x.endswith(("lore", "luru")) else x)
-df["cleaned_city"] = df["cleaned_city"].fillna("bangalore")
-df["subtotal"] = df["subtotal"].fillna(df["subtotal"].mean())
-df.drop(columns = ["city"], inplace = True)
-df["event_date"] = pd.to_datetime(df["event_date"])
-
-#--------------------------------------melting down data and creating ndf dataframe ------------------------------------
-id_vars = [
-    "user_pseudo_id", "event_date", "new_event_timestamp", "pincode",
-    "subtotal", "source_name", "source_medium", "source_origin",
-    "rw", "cleaned_city"
-]
-item_name = df.melt(
-    id_vars = id_vars,
-    value_vars = ["item_name_0","item_name_1","item_name_2","item_name_3","item_name_4"],
-    value_name = "Product_name",
-    var_name = "in"
-)
-item_price = df.melt(
-    id_vars= id_vars,
-    value_vars = ["price_0","price_1","price_2","price_3","price_4"],
-    value_name = "Price",
-    var_name = "ip"
-)
-item_quantity = df.melt(
-    id_vars = id_vars,
-    value_vars = ["quantity_0","quantity_1","quantity_2","quantity_3","quantity_4"],
-    value_name = "Quantity",
-    var_name = "iq"
-
-)
-item_variant = df.melt(
-    id_vars = id_vars,
-    value_vars = ["item_variant_0","item_variant_1","item_variant_2","item_variant_3","item_variant_4"],
-    value_name = "Item_variant",
-    var_name = "iv"
-
-)
-
-item_name["product_no"]    = item_name["in"].str.extract(r"(\d+)")
-item_price["product_no"]   = item_price["ip"].str.extract(r"(\d+)")
-item_quantity["product_no"]= item_quantity["iq"].str.extract(r"(\d+)")
-item_variant["product_no"] = item_variant["iv"].str.extract(r"(\d+)")
-
-
-item_name    = item_name.drop(columns=["in"])
-item_price   = item_price.drop(columns=["ip"])
-item_quantity= item_quantity.drop(columns=["iq"])
-item_variant = item_variant.drop(columns=["iv"])
-
-
-merged = (
-    item_name
-    .merge(item_price, on=id_vars + ["product_no"])
-    .merge(item_quantity, on=id_vars + ["product_no"])
-    .merge(item_variant, on=id_vars + ["product_no"])
-)
-
-  
-merged["Revenue"] = merged["Price"] * merged["Quantity"]
-ndf = merged.copy()
-
-#----------------------------------------------------sample data copy--------------------------------------------------
-from st_aggrid import AgGrid
-st.header("Sample Data")
-AgGrid(ndf.head(100))
+#------------------------------------------cleaned df and melted ndf (shared, read-only)-----------------------------------
+# Cleaning and melting now happen once per database generation inside datastore;
+# df and ndf are shared across sessions, so filter/copy them rather than mutate.
+ndf = frames["items"]
 
 #---------------------------------------side bar with filtered df and ndf--------------------------------------------------
 
@@ -184,10 +136,68 @@ with st.sidebar:
     
     # Add some spacing
     st.markdown("<br>", unsafe_allow_html=True)
-mask1 = (df["event_date"] >= pd.to_datetime(start_date)) & (df["event_date"] <= pd.to_datetime(end_date))
-mask2 = (ndf["event_date"] >= pd.to_datetime(start_date)) & (ndf["event_date"] <= pd.to_datetime(end_date))
-ddf = df.loc[mask1]
-dndf = ndf.loc[mask2]
+
+    paint = st.empty()
+
+    stats = datastore.cache_stats()
+    st.caption(f"Data cache: {stats['hit_rate']:.0%} hit rate, last load {stats['load_seconds']:.2f}s")
+    with st.expander("Memory"):
+        memory = frames["memory"]
+        st.caption(f"{memory['saved_bytes'].sum() / 2**20:,.1f} MB saved by the load-time dtypes")
+        st.dataframe(memory, hide_index = True)
+    with st.expander("Figure cache"):
+        charts, size = figcache.cache_stats()
+        st.caption(f"{size['entries']} figures, {size['bytes'] / 2**20:,.1f} MB")
+        st.dataframe(charts, hide_index = True)
+    debug = st.toggle("Debug timings", key = "debug_timings")
+    debug_panel = st.empty()
+# Charts read the pre-aggregated daily rollups; the pincode map reads the
+# sparse pincode x product matrix.
+cube = frames["rollup"]
+# Built figures are shared across reruns and sessions until the date range or
+# the data generation changes.
+figkey = figcache.key(start_date, end_date, frames["generation"])
+
+#----------------------------------------------------line item explorer--------------------------------------------------
+@page.section("sample_data", "Line Item Explorer")
+def sample_data_section():
+    from st_aggrid import AgGrid
+    # Only the visible page is queried and sent to the grid.
+    def first_page():
+        st.session_state["explorer_page"] = 1
+    cols = st.columns(4)
+    filters = {column: cols[i % 4].text_input(column, key = f"explorer_{column}", on_change = first_page) for i, column in enumerate(["Product_name", "pincode", "category", "cleaned_city"])}
+    cols = st.columns(4)
+    sort = cols[0].selectbox("Sort by", explorer.COLUMNS, key = "explorer_sort", on_change = first_page)
+    descending = cols[1].toggle("Descending", value = True, key = "explorer_desc", on_change = first_page)
+    page_size = cols[2].selectbox("Rows per page", explorer.PAGE_SIZES, index = 1, key = "explorer_size", on_change = first_page)
+    # Pull the page back within the page count the last run found.
+    if st.session_state.get("explorer_page", 1) > st.session_state.get("explorer_pages", float("inf")):
+        st.session_state["explorer_page"] = st.session_state["explorer_pages"]
+    page_no = cols[3].number_input("Page", min_value = 1, step = 1, key = "explorer_page")
+
+    def fetch(page_no):
+        args = (start_date, end_date, filters, sort, descending, page_no - 1, page_size)
+        if os.path.exists(datastore.DB_PATH):
+            con = explorer.connect(datastore.DB_PATH)
+            try:
+                # Older amin.db files have no sales_items; datastore derives the items instead.
+                if explorer.has_table(con):
+                    return explorer.page_sql(con, *args)
+            finally:
+                con.close()
+        return explorer.page_frame(ndf, *args)
+    rows, total = fetch(page_no)
+    pages = max(-(-total // page_size), 1)
+    if page_no > pages:
+        # Past the end, e.g. after the date range narrowed: show the last page.
+        page_no = pages
+        rows, total = fetch(page_no)
+    st.session_state["explorer_pages"] = pages
+    first = (page_no - 1) * page_size
+    st.caption(f"Rows {min(first + 1, total):,}–{min(first + page_size, total):,} of {total:,} · page {page_no} of {pages:,}")
+    AgGrid(rows, key = "explorer_grid")
+
 
 
 
@@ -197,503 +207,370 @@ st.markdown("## Question Insight Action")
 st.markdown('***')
 
 #---------------------------------------------------Question 1---------------------------------------------------------------------
-st.markdown("### Which Pincode Generates the Highest Sales ? ")
-pin = ddf.groupby("pincode")["subtotal"].sum().reset_index().sort_values(by = "subtotal", ascending = False)
-pin["pincode"] = pin["pincode"].astype(str)
-fig = px.bar(pin, x = "pincode", y = "subtotal", text = round(pin["subtotal"]/1000), labels = {"pincode":"Pincode", "subtotal": "Total Sales"},color = "subtotal", color_continuous_scale="GnBu")
-
-fig.update_xaxes(
-    range = [-0.5,10],
-    tickfont = dict(color="black")
-)
-fig.update_traces(
-    marker_line_color = "black",
-    marker_line_width = 1.5,
-    texttemplate = "%{text}k",
-    textposition = "outside",
-    outsidetextfont=dict(color="black")
-)
-fig.update_layout(
-    height= 500,
-    width = 800,
-    template="plotly_white",
-    plot_bgcolor="white",
-    paper_bgcolor="white",
-    font=dict(color="black"),
-    margin=dict( t=80, b=60),
-    annotations=[
-        dict(
-            text="Highest Sales By Pincode",
-            x=0.555,
-            y=1.22,
-            xref="paper",
-            yref="paper",
-            font=dict(size=25, family="Arial", color="#1e3a8a",weight = "bold"),
-            showarrow=False,
-            bgcolor="white",
-            bordercolor="#1e40af", 
-            borderwidth=2.4,
-            borderpad=14,
-            width = 668,
-            align = "left",
-
-            
-        )]
-
-
-)
-st.plotly_chart(fig, use_container_width=False)
-
-st.markdown('''<div class = "summary"><p>The 560037 pincode leads with a total sales value of 2,242k, indicating a strong customer base and high purchasing activity in this region. This is closely followed by 560076 with 2,146k sales, suggesting comparable market potential. The third-highest contributor, 560102, records 2,089k in sales, further highlighting its significance in the overall revenue mix</p></div>''', unsafe_allow_html= True)
+@page.section("pincode_sales", "Which Pincode Generates the Highest Sales ?", expanded = True)
+def pincode_sales_section():
+    def pincode_sales_chart():
+        pin = metrics.pincode_sales(cube, start_date, end_date)
+        fig = px.bar(pin, x = "pincode", y = "subtotal", text = round(pin["subtotal"]/1000), labels = {"pincode":"Pincode", "subtotal": "Total Sales"},color = "subtotal", color_continuous_scale="GnBu")
+
+        fig.update_xaxes(
+            range = [-0.5,10],
+            tickfont = dict(color="black")
+        )
+        fig.update_traces(
+            marker_line_color = "black",
+            marker_line_width = 1.5,
+            texttemplate = "%{text}k",
+            textposition = "outside",
+            outsidetextfont=dict(color="black")
+        )
+        fig.update_layout(
+            height= 500,
+            width = 800,
+            template="plotly_white",
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            font=dict(color="black"),
+            margin=dict( t=80, b=60),
+            annotations=[
+                dict(
+                    text="Highest Sales By Pincode",
+                    x=0.555,
+                    y=1.22,
+                    xref="paper",
+                    yref="paper",
+                    font=dict(size=25, family="Arial", color="#1e3a8a",weight = "bold"),
+                    showarrow=False,
+                    bgcolor="white",
+                    bordercolor="#1e40af", 
+                    borderwidth=2.4,
+                    borderpad=14,
+                    width = 668,
+                    align = "left",
+
+
+                )]
+
+
+        )
+        return fig
+    st.plotly_chart(figcache.figure("pincode_sales", figkey, pincode_sales_chart), use_container_width=False)
+
+    st.markdown('''<div class = "summary"><p>The 560037 pincode leads with a total sales value of 2,242k, indicating a strong customer base and high purchasing activity in this region. This is closely followed by 560076 with 2,146k sales, suggesting comparable market potential. The third-highest contributor, 560102, records 2,089k in sales, further highlighting its significance in the overall revenue mix</p></div>''', unsafe_allow_html= True)
 
 
 #-------------------------------------Top Selling Item of Each Pincode------------------------------
-
-st.markdown('''#### Let’s take a look at the **top-selling item in each pincode**.''')
-sell = dndf.groupby(["pincode", "Product_name"]).agg({
-    "Quantity":"sum",
-    "Revenue":"sum"
-}).reset_index().sort_values(by = "Quantity", ascending = False)
-geo = pd.read_csv(r"pincode_with_lat-long.csv",low_memory=False)
-geo = geo.rename(columns = {"Pincode":"pincode"})
-geoloc = geo[["pincode","Latitude", "Longitude"]]
-sell = sell.merge(geoloc, on="pincode", how = "left")
-fig = px.scatter_map(sell, lat = "Latitude", lon = "Longitude", size = "Revenue", color = "Quantity", hover_name = "pincode", hover_data = ["Product_name", "Quantity", "Revenue"], center = {"lat":12.9716, "lon":77.5946}, zoom = 10, color_continuous_scale=px.colors.sequential.Plasma_r )
-fig.update_layout(
-    height = 500,
-    width = 300,
-    margin={"r":0,"t":40,"l":0,"b":0},
-)
-st.plotly_chart(fig, use_container_with = False)
-st.write('''***''')
+@page.section("pincode_map", "Let’s take a look at the **top-selling item in each pincode**.")
+def pincode_map_section():
+    grid = st.radio("Map points", list(geo.GRIDS), horizontal = True)
+    def pincode_map_chart():
+        # Per-pincode totals and top products come from the sparse pincode x product matrix.
+        points = geo.place(matrix.pincode_top(frames["matrix"], start_date, end_date), datastore.get_geo())
+        sell = geo.grid_points(points, geo.GRIDS[grid])
+        fig = px.scatter_map(sell, lat = "Latitude", lon = "Longitude", size = "Revenue", color = "Quantity", hover_name = "pincode", hover_data = ["Product_name", "Quantity", "Revenue"], center = {"lat":12.9716, "lon":77.5946}, zoom = 10, color_continuous_scale=px.colors.sequential.Plasma_r )
+        fig.update_layout(
+            height = 500,
+            width = 300,
+            margin={"r":0,"t":40,"l":0,"b":0},
+        )
+        return fig
+    st.plotly_chart(figcache.figure("pincode_map", figcache.key(figkey, grid), pincode_map_chart), use_container_width = False)
 
 #-------------------------------------------Average Order Value-----------------------------------------------
-
-st.markdown('### Average Order Value at different location ?')
-count_city = ddf["cleaned_city"].value_counts()[ddf["cleaned_city"].value_counts() > 9].index
-newcity = ddf[ddf["cleaned_city"].isin(count_city)]
-nc = newcity.groupby("cleaned_city")["subtotal"].mean().reset_index().sort_values(by = "subtotal", ascending = False)
-fig = px.bar(nc, x="cleaned_city", y="subtotal",text = nc["subtotal"]/1000, labels = {"cleaned_city":"City","subtotal":"Average Order Value"}, color = "subtotal", color_continuous_scale= "Blues")
-fig.update_traces(
-    marker_line_color = "black",
-    marker_line_width = 2,
-    texttemplate = "%{text:.2f}k",
-    textposition = "outside"
-)
-fig.update_xaxes(
-    tickfont = dict(color = "black")
-)
-fig.update_layout(
-    height= 500,
-    width = 800,
-    font=dict(color="black"),
-    template="plotly_white",
-    plot_bgcolor="white",
-    paper_bgcolor="white",
-    margin=dict( t=80, b=60),
-    annotations=[
-        dict(
-            text="Average Order Value",
-            x=0.620,
-            y=1.24,
-            xref="paper",
-            yref="paper",
-            font=dict(size=25, family="Arial", color="#1e3a8a",weight = "bold"),
-            showarrow=False,
-            bgcolor="white",
-            bordercolor="#1e40af", 
-            borderwidth=2,
-            borderpad=14,
-            width = 670,
-            align = "left",
-            
-        )])
-st.plotly_chart(fig, use_container_width=False)
-st.markdown('''<div class = "summary"><p>Average order value analysis shows Chennai leading with ₹2.07k, followed by Electronic City (Bangalore) at ₹1.95k. Yelahanka (Bangalore) ranks third with ₹1.86k, and Mumbai follows with ₹1.70k.These results highlight strong purchasing power in Chennai and key Bangalore localities</p></div>''',unsafe_allow_html= True)
-st.markdown("***")
+@page.section("city_aov", "Average Order Value at different location ?")
+def city_aov_section():
+    # Median and p90 come from the daily order value sketches (about 1% relative error).
+    stat = st.radio("Order value", ["mean", "median", "p90"], horizontal = True, key = "city_aov_stat")
+    title = {"mean": "Average Order Value", "median": "Median Order Value", "p90": "90th Percentile Order Value"}[stat]
+    def city_aov_chart():
+        nc = metrics.city_aov(cube, start_date, end_date, stat = stat)
+        nc = nc.assign(subtotal = nc["aov"])
+        fig = px.bar(nc, x="cleaned_city", y="subtotal",text = nc["subtotal"]/1000, labels = {"cleaned_city":"City","subtotal":title}, color = "subtotal", color_continuous_scale= "Blues")
+        fig.update_traces(
+            marker_line_color = "black",
+            marker_line_width = 2,
+            texttemplate = "%{text:.2f}k",
+            textposition = "outside"
+        )
+        fig.update_xaxes(
+            tickfont = dict(color = "black")
+        )
+        fig.update_layout(
+            height= 500,
+            width = 800,
+            font=dict(color="black"),
+            template="plotly_white",
+            plot_bgcolor="white",
+            paper_bgcolor="white",
+            margin=dict( t=80, b=60),
+            annotations=[
+                dict(
+                    text=title,
+                    x=0.620,
+                    y=1.24,
+                    xref="paper",
+                    yref="paper",
+                    font=dict(size=25, family="Arial", color="#1e3a8a",weight = "bold"),
+                    showarrow=False,
+                    bgcolor="white",
+                    bordercolor="#1e40af", 
+                    borderwidth=2,
+                    borderpad=14,
+                    width = 670,
+                    align = "left",
+
+                )])
+        return fig
+    st.plotly_chart(figcache.figure("city_aov", figcache.key(figkey, stat), city_aov_chart), use_container_width=False)
+    st.markdown('''<div class = "summary"><p>Average order value analysis shows Chennai leading with ₹2.07k, followed by Electronic City (Bangalore) at ₹1.95k. Yelahanka (Bangalore) ranks third with ₹1.86k, and Mumbai follows with ₹1.70k.These results highlight strong purchasing power in Chennai and key Bangalore localities</p></div>''',unsafe_allow_html= True)
 #-------------------------------------------Most Sold Item By Quantity-----------------------------------------------------------
-st.markdown('''### What is the top-selling item based on total quantity sold?''')
-items = dndf.groupby("Product_name")["Quantity"].sum().reset_index().sort_values(by = "Quantity", ascending = False).head(10)
-fig = px.pie(items, values = "Quantity", names = "Product_name", color = 'Quantity', hole = 0.4)
-fig.update_traces(textinfo = "percent+label", textposition = 'outside', textfont = dict(color = 'black'),domain=dict(x=[0.15, 0.85], y=[0, 1]),
-    marker = dict(
-    line = dict(color = "black", width = 2)
-))
-fig.update_layout(
-    height = 600,
-    width = 800,
-    margin = {'t':50,'l':0,'r':0,'b':0},
-        legend=dict(
-        orientation="v",        
-        yanchor="bottom",
-        y=-0.5,                  
-        xanchor="center",
-        x=1,                 
-        bgcolor="white",       
-        bordercolor="black",
-        borderwidth=1
-    ),
-    # annotations = [
-    #     dict(
-    #         text="Most Sold Item By Quantity",
-    #         x=1.7,
-    #         y=1.25,
-    #         xref="paper",
-    #         yref="paper",
-    #         font=dict(size=25, family="Arial", color="#91770A",weight = "bold"),
-    #         showarrow=False,
-    #         bgcolor="white",
-    #         bordercolor="#91770A", 
-    #         borderwidth=2,
-    #         borderpad=14,
-    #         width = 620,
-    #         align = "left",
-    #     )
-    # ]
-)
-st.plotly_chart(fig, use_container_width=True)
-
-st.markdown('''<div class = "summary"><p>The analysis reveals that Croissant is the top-selling item, contributing 12.9% of total sales quantity. It is closely followed by Tres Leches (12%) and Ferrero Rocher (11%), making these three items the dominant contributors to overall sales performance.</p></div>''',unsafe_allow_html= True)
+@page.section("top_products", "What is the top-selling item based on total quantity sold?")
+def top_products_section():
+    def product_pie_chart():
+        items = metrics.top_products(cube, start_date, end_date)
+        fig = px.pie(items, values = "Quantity", names = "Product_name", color = 'Quantity', hole = 0.4)
+        fig.update_traces(textinfo = "percent+label", textposition = 'outside', textfont = dict(color = 'black'),domain=dict(x=[0.15, 0.85], y=[0, 1]),
+            marker = dict(
+            line = dict(color = "black", width = 2)
+        ))
+        fig.update_layout(
+            height = 600,
+            width = 800,
+            margin = {'t':50,'l':0,'r':0,'b':0},
+                legend=dict(
+                orientation="v",        
+                yanchor="bottom",
+                y=-0.5,                  
+                xanchor="center",
+                x=1,                 
+                bgcolor="white",       
+                bordercolor="black",
+                borderwidth=1
+            ),
+            # annotations = [
+            #     dict(
+            #         text="Most Sold Item By Quantity",
+            #         x=1.7,
+            #         y=1.25,
+            #         xref="paper",
+            #         yref="paper",
+            #         font=dict(size=25, family="Arial", color="#91770A",weight = "bold"),
+            #         showarrow=False,
+            #         bgcolor="white",
+            #         bordercolor="#91770A", 
+            #         borderwidth=2,
+            #         borderpad=14,
+            #         width = 620,
+            #         align = "left",
+            #     )
+            # ]
+        )
+        return fig
+    st.plotly_chart(figcache.figure("product_pie", figkey, product_pie_chart), use_container_width=True)
+
+    st.markdown('''<div class = "summary"><p>The analysis reveals that Croissant is the top-selling item, contributing 12.9% of total sales quantity. It is closely followed by Tres Leches (12%) and Ferrero Rocher (11%), making these three items the dominant contributors to overall sales performance.</p></div>''',unsafe_allow_html= True)
 
-st.markdown("***")
 #---------------------------Top Seller By Revenue and Quantity-------------------------------
-
-st.markdown('### Top Seller By Revenue and Quantity')
-
-dndf = dndf.drop(columns = "product_no")
-dndf = dndf.dropna(subset=["Product_name"])
-productrevenue = dndf.groupby("Product_name").agg(
-    {
-        'Revenue': 'sum',
-        'Quantity': 'sum'
-    }
-).reset_index().sort_values(by = 'Revenue', ascending = False)
-pr = productrevenue.melt(
-    id_vars = "Product_name",
-    value_vars = ["Revenue", "Quantity"],
-    var_name = "Metric",
-    value_name = "Value"
-)
-fig = px.bar(pr, x = "Product_name", y="Value", color = "Metric", barmode = "group", color_discrete_map={
-        "Revenue": "#1960a2",
-        "Quantity": "#fe6e61"
-    })
-fig.update_xaxes(
-    range = [-0.5,10],
-    tickfont = dict(color="black")
-)
-fig.update_traces(
-    marker_line_color = "black",
-    marker_line_width = 2,
-)
-fig.update_layout(
-    height= 500,
-    width = 900,
-    )
-st.plotly_chart(fig, use_container_width=False)
-
-st.markdown('''<div class = "summary"><p>When measured by revenue, the top-performing products are Tres Leches (2.7M), Ferrero Rocher (2.25M), and Pineapple Cherry Cake (2.1M). However, in terms of quantity sold, the leading item shifts to Burnt Basque Cheesecake (1,517 units), followed by Tres Leches (1,415 units) and Ferrero Rocher (1,290 units).
+@page.section("product_revenue", "Top Seller By Revenue and Quantity")
+def product_revenue_section():
+    def product_revenue_chart():
+        productrevenue = metrics.products(cube, start_date, end_date)
+        pr = productrevenue.melt(
+            id_vars = "Product_name",
+            value_vars = ["Revenue", "Quantity"],
+            var_name = "Metric",
+            value_name = "Value"
+        )
+        fig = px.bar(pr, x = "Product_name", y="Value", color = "Metric", barmode = "group", color_discrete_map={
+                "Revenue": "#1960a2",
+                "Quantity": "#fe6e61"
+            })
+        fig.update_xaxes(
+            range = [-0.5,10],
+            tickfont = dict(color="black")
+        )
+        fig.update_traces(
+            marker_line_color = "black",
+            marker_line_width = 2,
+        )
+        fig.update_layout(
+            height= 500,
+            width = 900,
+            )
+        return fig
+    st.plotly_chart(figcache.figure("product_revenue", figkey, product_revenue_chart), use_container_width=False)
+
+    st.markdown('''<div class = "summary"><p>When measured by revenue, the top-performing products are Tres Leches (2.7M), Ferrero Rocher (2.25M), and Pineapple Cherry Cake (2.1M). However, in terms of quantity sold, the leading item shifts to Burnt Basque Cheesecake (1,517 units), followed by Tres Leches (1,415 units) and Ferrero Rocher (1,290 units).
 
 This indicates that while premium cakes such as Tres Leches dominate in revenue contribution, certain products like Burnt Basque Cheesecake achieve higher sales volume, reflecting strong customer demand at possibly lower price points.</p></div>''',unsafe_allow_html= True)
-st.markdown("***")
 
 #----------------------------------------------Revenue Contribution by Category------------------------------------------------
-st.markdown('''### What is the Revenue Contribution of each Product Category''')
-product_category = {
-    "Almond And Milk Chocolate Brunette": "Cakes & Loaves",
-    "Almond And Milk Chocolate Brunette (Eggless)": "Cakes & Loaves",
-    "Almond And Milk Chocolate Brunette (eggless)": "Cakes & Loaves",
-    "Almond and Milk Chocolate Brunette": "Cakes & Loaves",
-    "Almond and Milk Chocolate Brunette (Eggless)": "Cakes & Loaves",
-    "Banoffee Cake": "Cakes & Loaves",
-    "Belgian Dark Chocolate Truffle Cake (Eggless)": "Cakes & Loaves",
-    "Belgian Dark Chocolate Truffle Cake (eggless)": "Cakes & Loaves",
-    "Belgian Dark Chocolate Truffle cake (Eggless)": "Cakes & Loaves",
-    "Black Satin Entremet (Chocolate Mousse Cake)": "Cakes & Loaves",
-    "Blueberry Cheesecake (Eggless)": "Cakes & Loaves",
-    "Blueberry Cheesecake (eggless)": "Cakes & Loaves",
-    "Burnt Basque Cheesecake": "Cakes & Loaves",
-    "Burnt basque cheesecake": "Cakes & Loaves",
-    "Classic Black Forest Cake": "Cakes & Loaves",
-    "Coffee Pecan Praline Cake": "Cakes & Loaves",
-    "Coffee pecan praline cake": "Cakes & Loaves",
-    "Cookie Dough Cake": "Cakes & Loaves",
-    "Cookie Dough Cake (Eggless)": "Cakes & Loaves",
-    "Cookie Dough Cake (eggless)": "Cakes & Loaves",
-    "Dark Chocolate and Strawberry cake": "Cakes & Loaves",
-    "Date, Palm And Walnut Cake (Vegan)": "Cakes & Loaves",
-    "Date, Palm And Walnut Cake (vegan)": "Cakes & Loaves",
-    "Date, Palm and Walnut Cake (Vegan)": "Cakes & Loaves",
-    "Deep Chocolate Pull Up  Cake": "Cakes & Loaves",
-    "Deep Chocolate Pull Up Cake": "Cakes & Loaves",
-    "Ferrero Rocher Cake": "Cakes & Loaves",
-    "Fresh Strawberry Cheesecake": "Cakes & Loaves",
-    "Fresh Strawberry Cheesecake (Eggless)": "Cakes & Loaves",
-    "Fresh strawberry and cream cake": "Cakes & Loaves",
-    "Hazelnut Chocolate Truffle Cake (Eggless)": "Cakes & Loaves",
-    "Hazelnut Chocolate Truffle Cake (eggless)": "Cakes & Loaves",
-    "Hazelnut Milk Chocolate Entremet": "Cakes & Loaves",
-    "Intense Chocolate And Caramel Cake": "Cakes & Loaves",
-    "Intense chocolate and caramel cake": "Cakes & Loaves",
-    "La Vie En Rose": "Cakes & Loaves",
-    "La vie en rose": "Cakes & Loaves",
-    "Lemon, Olive Oil And Chia Seed": "Cakes & Loaves",
-    "Lemon, Olive Oil and Chia Seed": "Cakes & Loaves",
-    "Lotus Biscoff Cake Loaf (Eggless)": "Cakes & Loaves",
-    "Lotus Biscoff Cake Loaf (eggless)": "Cakes & Loaves",
-    "Lotus Biscoff Pull Up  Cake": "Cakes & Loaves",
-    "Lotus Biscoff Pull Up  Cake (Eggless)": "Cakes & Loaves",
-    "Lotus Biscoff Pull Up Cake": "Cakes & Loaves",
-    "Lotus Biscoff Pull Up Cake (Eggless)": "Cakes & Loaves",
-    "Lotus Biscoff Pull Up Cake (eggless)": "Cakes & Loaves",
-    "Mango And Cashew Entremet": "Cakes & Loaves",
-    "Mango and Cashew entremet": "Cakes & Loaves",
-    "Mango Cheesecake (Eggless)": "Cakes & Loaves",
-    "Mango Pull Up Cake (eggless)": "Cakes & Loaves",
-    "Mango pull up cake": "Cakes & Loaves",
-    "Mango pull up cake (eggless)": "Cakes & Loaves",
-    "Mango Tres Leches Dapper": "Cakes & Loaves",
-    "Mango Tres Leches Dapper (Eggless)": "Cakes & Loaves",
-    "Mango Tres leches Dapper": "Cakes & Loaves",
-    "Matilda Cake": "Cakes & Loaves",
-    "Matilda cake": "Cakes & Loaves",
-    "Nutella And Fresh Strawberry Entremet": "Cakes & Loaves",
-    "Nutella and Fresh Strawberry Entremet": "Cakes & Loaves",
-    "Nutella Pull Up Cake": "Cakes & Loaves",
-    "Nutella pull up cake": "Cakes & Loaves",
-    "Opera": "Cakes & Loaves",
-    "Peaches & Cream": "Cakes & Loaves",
-    "Pineapple, Lychee And Cherry Cake": "Cakes & Loaves",
-    "Pineapple, Lychee And Cherry Cake (Eggless)": "Cakes & Loaves",
-    "Pineapple, Lychee And Cherry Cake (eggless)": "Cakes & Loaves",
-    "Pineapple, Lychee and Cherry Cake": "Cakes & Loaves",
-    "Pineapple, Lychee and Cherry Cake (Eggless)": "Cakes & Loaves",
-    "Red Velvet": "Cakes & Loaves",
-    "Red Velvet (Eggless)": "Cakes & Loaves",
-    "Saffron Rasmalai Cake (Eggless)": "Cakes & Loaves",
-    "Saffron Rasmalai Cake (eggless)": "Cakes & Loaves",
-    "The Rakhi cake (Saffron Rasmalai eggless)": "Cakes & Loaves",
-    "Strawberry Pull up": "Cakes & Loaves",
-    "Strawberry Pull up (Eggless)": "Cakes & Loaves",
-    "Strawberry Streusel Cake": "Cakes & Loaves",
-    "Strawberry Streusel Cake (Eggless)": "Cakes & Loaves",
-    "Strawberry Streusel Cake (eggless)": "Cakes & Loaves",
-    "Sugar-Free Belgian Chocolate Truffle cake (Eggless)": "Cakes & Loaves",
-    "Sugar-Free Belgian Chocolate Truffle cake (eggless)": "Cakes & Loaves",
-    "Tiramisu Cake": "Cakes & Loaves",
-    "Tres Leches Dapper": "Cakes & Loaves",
-    "Tres Leches Dapper (Eggless)": "Cakes & Loaves",
-    "Tres Leches Dapper (eggless)": "Cakes & Loaves",
-    "Walnut Banana And Whole Wheat Cake": "Cakes & Loaves",
-    "Walnut Banana and Whole Wheat Cake": "Cakes & Loaves",
-    "White Chocolate Raspberry": "Cakes & Loaves",
-
-
-    "Almond Rocks": "Brownies & Blondies",
-    "Almond rocks": "Brownies & Blondies",
-    "Chocolate Fudge Brownie": "Brownies & Blondies",
-    "Chocolate Fudge Brownie (Eggless)": "Brownies & Blondies",
-    "Chocolate Fudge Brownie (eggless)": "Brownies & Blondies",
-    "Double Chocolate Walnut Brownie": "Brownies & Blondies",
-    "Double Chocolate Walnut Brownie (Eggless)": "Brownies & Blondies",
-    "Double Chocolate Walnut Brownie (eggless)": "Brownies & Blondies",
-    "Double Chocolate With Caramelised Pistachio (Eggless)": "Brownies & Blondies",
-    "Double Chocolate With Caramelised Pistachio (eggless)": "Brownies & Blondies",
-    "Double Chocolate with Caramelised Pistachio (Eggless)": "Brownies & Blondies",
-    "Gluten Free Chocolate Fudge Brownie": "Brownies & Blondies",
-    "Nutella Brownie": "Brownies & Blondies",
-    "Nutella Brownie (Eggless)": "Brownies & Blondies",
-    "Nutella Brownie (eggless)": "Brownies & Blondies",
-    "Pistachio Blondie": "Brownies & Blondies",
-    "Pistachio Blondie (Eggless)": "Brownies & Blondies",
-    "Pistachio Blondie (eggless)": "Brownies & Blondies",
-
-   
-    "Bagels": "Cookies & Biscuits",
-    "Box Of 4": "Cookies & Biscuits",
-    "Box of 4": "Cookies & Biscuits",
-    "Cookies Box Of 3": "Cookies & Biscuits",
-    "Cookies Box of 3": "Cookies & Biscuits",
-    "Croissants": "Cookies & Biscuits",
-    "Eggless Croissant": "Cookies & Biscuits",
-    "Eggless croissant": "Cookies & Biscuits",
-    "DIY cookie dough": "Cookies & Biscuits",
-    "Macaron Box Of 6": "Cookies & Biscuits",
-    "Macaron Box of 6": "Cookies & Biscuits",
-    "Mixed Herbs And Cheese Sable": "Cookies & Biscuits",
-    "Mixed herbs and cheese sable": "Cookies & Biscuits",
-    "Nutty Cookies (Eggless)": "Cookies & Biscuits",
-    "Nutty Cookies (eggless)": "Cookies & Biscuits",
-    "Paprika And Cheese Crackers": "Cookies & Biscuits",
-    "Paprika and cheese crackers": "Cookies & Biscuits",
-    "Parmesan Cheese Crackers": "Cookies & Biscuits",
-    "Parmesan cheese crackers": "Cookies & Biscuits",
-    "Salted Butter Crackers": "Cookies & Biscuits",
-    "Salted butter crackers": "Cookies & Biscuits",
-    "Shrewsbury Thins": "Cookies & Biscuits",
-    "Shrewsbury thins": "Cookies & Biscuits",
-    "Red velvet Cream Cheese cookies": "Cookies & Biscuits",
-
-
-    "Brioche": "Breads",
-    "Sourdough Bread": "Breads",
-    "Sourdough Bread (Eggless)": "Breads",
-    "Sourdough Bread (eggless)": "Breads",
-
-
-    "BESTSELLER PACK OF 2": "Hampers & Specials",
-    "BESTSELLER PACK OF 2 (Eggless)": "Hampers & Specials",
-    "BESTSELLER PACK OF 2 (eggless)": "Hampers & Specials",
-    "Hamper : Decadent (Eggless)": "Hampers & Specials",
-    "Hamper : Decadent (eggless)": "Hampers & Specials",
-    "Hamper : Indulgent (Eggless)": "Hampers & Specials",
-    "Hamper : Indulgent (eggless)": "Hampers & Specials",
-    "Hamper : Luxurious (Eggless)": "Hampers & Specials",
-    "Hamper : Luxurious (eggless)": "Hampers & Specials",
-    "Hamper : Sumptuous (Eggless)": "Hampers & Specials",
-    "Hamper : Sumptuous (eggless)": "Hampers & Specials",
-    "Valentine's Hamper: Adore": "Hampers & Specials",
-    "Rakhi special : Blooms Before Bickering": "Hampers & Specials",
-
-    "Coffee": "Beverages & Jars",
-    "Hot Chocolate Powder": "Beverages & Jars",
-    "Hot chocolate powder": "Beverages & Jars",
-    "Honey Mixed Dry Fruit Jar": "Beverages & Jars",
-    "Honey mixed dry fruit jar": "Beverages & Jars",
-
-
-    "Balloon pump": "Accessories",
-    "Balloon Pump": "Accessories",
-    "Birthday Balloons (Pack Of 15)": "Accessories",
-    "Birthday balloons (Pack of 15)": "Accessories",
-    "Birthday Banner": "Accessories",
-    "Cake Toppers": "Accessories",
-    "Cake toppers": "Accessories",
-    "Candles": "Accessories",
-    "Split delivery": "Accessories",
-
-
-    "Autumn Serenade": "Artistic Specials",
-    "Autumn serenade": "Artistic Specials",
-    "Blush": "Artistic Specials",
-    "Golden Hour": "Artistic Specials",
-    "Golden hour": "Artistic Specials",
-    "Mauve Season": "Artistic Specials",
-    "Scarlett Whim": "Artistic Specials",
-    "Scarlett whim": "Artistic Specials",
-    "Sun Drenched": "Artistic Specials",
-    "Sun drenched": "Artistic Specials",
-}
-
-dndf["category"] = dndf["Product_name"].map(product_category)
-revcat = dndf.groupby("category")["Revenue"].sum().reset_index().sort_values(by = "Revenue", ascending = False)
-revcat["Revenue"] = revcat["Revenue"].round(2)
-fig = px.treemap(revcat, path = ["category"], values=revcat["Revenue"])
-fig.update_traces(
-    texttemplate = "<b>%{label}</b><br>Revenue - %{value: .2f}<br>Margin -%{percentParent: .1%}",
-    textinfo = "label+value+percent root"
-)
-st.plotly_chart(fig, use_container_width= False)
-
-st.markdown('''<div class = "summary"><p>The revenue distribution is heavily dominated by the Cakes and Loaves category, which contributes nearly 89% of total revenue. This is followed by Brownies & Blondies (4.9%) and Cookies & Biscuits (2.9%), while other categories contribute marginally.This highlights that cakes and loaves are the primary revenue drivers, suggesting that customer preference and purchasing power are strongly centered around premium cake products, whereas smaller categories play only a supporting role in overall sales.</p></div>''',unsafe_allow_html= True)
+@page.section("category_revenue", "What is the Revenue Contribution of each Product Category")
+def category_revenue_section():
+    def category_treemap_chart():
+        revcat = metrics.category_revenue(cube, start_date, end_date)
+        fig = px.treemap(revcat, path = ["category"], values=revcat["Revenue"])
+        fig.update_traces(
+            texttemplate = "<b>%{label}</b><br>Revenue - %{value: .2f}<br>Margin -%{percentParent: .1%}",
+            textinfo = "label+value+percent root"
+        )
+        return fig
+    st.plotly_chart(figcache.figure("category_treemap", figkey, category_treemap_chart), use_container_width= False)
+
+    revprod = metrics.products(cube, start_date, end_date).set_index("Product_name")["Revenue"]
+    missing = categories.unmapped(revprod.index)
+    if len(missing):
+        with st.expander(f"{len(missing)} products without a category (₹{revprod[missing.index].sum():,.0f} not in the treemap)"):
+            st.dataframe(revprod[missing.index].rename("Revenue").sort_values(ascending = False))
+
+    st.markdown('''<div class = "summary"><p>The revenue distribution is heavily dominated by the Cakes and Loaves category, which contributes nearly 89% of total revenue. This is followed by Brownies & Blondies (4.9%) and Cookies & Biscuits (2.9%), while other categories contribute marginally.This highlights that cakes and loaves are the primary revenue drivers, suggesting that customer preference and purchasing power are strongly centered around premium cake products, whereas smaller categories play only a supporting role in overall sales.</p></div>''',unsafe_allow_html= True)
 
-st.markdown("***")
 
 # ---------------------- Which marketing source drives the highest Revenue ------------------------------
-st.markdown("### Which marketing source drives the highest revenue?")
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'direct' if 'direct' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'instagram' if 'insta' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'facebook' if 'fb' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'yahoo' if 'yahoo' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'youtube' if 'youtube' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'chatgpt' if 'chatgpt'in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'google' if 'google' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'bing' if 'bing' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'cdn' if 'cdn' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'duckduckgo' if 'duck' in str(x).lower().strip() else x)
-ddf["source_origin"] = ddf["source_origin"].apply(lambda x: 'others' if 'available' in str(x).lower().strip() else x)
-marketingsource = ddf.groupby("source_origin")["subtotal"].sum().reset_index().sort_values(by = "subtotal", ascending = False).nlargest(10, "subtotal")
-fig = px.bar(marketingsource, x = "source_origin", y = "subtotal", color = "source_origin")
-fig.update_yaxes(
-    type = 'log'
-)
-st.plotly_chart(fig, use_container_width= False)
-
-st.markdown('''<div class = "summary"><p>Google as a channel contributes the highest revenue at ₹40M, far surpassing other sources such as Direct (₹7.7M), Facebook (₹1.6M), and Instagram (₹0.75M). However, since the “Google” category aggregates multiple platforms (e.g., Search, Display, YouTube), this dominance may actually reflect a combination of distinct sub-channels.</p></div>''',unsafe_allow_html= True)
-st.markdown("***")
+@page.section("source_revenue", "Which marketing source drives the highest revenue?")
+def source_revenue_section():
+    def source_revenue_chart():
+        marketingsource = metrics.source_revenue(cube, start_date, end_date)
+        fig = px.bar(marketingsource, x = "source_origin", y = "subtotal", color = "source_origin")
+        fig.update_yaxes(
+            type = 'log'
+        )
+        return fig
+    st.plotly_chart(figcache.figure("source_revenue", figkey, source_revenue_chart), use_container_width= False)
+
+    st.markdown('''<div class = "summary"><p>Google as a channel contributes the highest revenue at ₹40M, far surpassing other sources such as Direct (₹7.7M), Facebook (₹1.6M), and Instagram (₹0.75M). However, since the “Google” category aggregates multiple platforms (e.g., Search, Display, YouTube), this dominance may actually reflect a combination of distinct sub-channels.</p></div>''',unsafe_allow_html= True)
 
 #--------------------------------What’s the trend in total orders and revenue over time----------------------------------------------
-st.markdown("### Trends in Order and Revenue over time")
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-
-
-trends = ddf.groupby(ddf["event_date"].dt.date).agg({
-    "user_pseudo_id": 'count',
-    "subtotal": 'sum'
-}).rename(columns={"user_pseudo_id":"total_purchase"}).reset_index()
-
-
-fig = make_subplots(specs=[[{"secondary_y": True}]])
-
-fig.add_trace(
-    go.Scatter(
-        x=trends["event_date"],
-        y=trends["subtotal"],
-        name="Subtotal",
-        line=dict(color="red", width=3)
-    ),
-    secondary_y=False
-)
-
-fig.add_trace(
-    go.Scatter(
-        x=trends["event_date"],
-        y=trends["total_purchase"],
-        name="Total Purchase",
-        line=dict(color="blue", width=3)
-    ),
-    secondary_y=True
-)
-
-fig.update_xaxes(title_text="Date")
-fig.update_yaxes(title_text="Revenue", secondary_y=False)
-fig.update_yaxes(title_text="Total Purchase", secondary_y=True)
-
-
-fig.update_layout(
-    legend=dict(x=0.85, y=1),
-    template="plotly_white",
-    height=600,
-    width=1000
-)
-st.plotly_chart(fig, use_container_width= False)
-
-st.markdown('''<div class = "summary"><p>The trend analysis shows that orders and revenue move proportionally over time — whenever the number of orders increases, revenue rises accordingly. Overall, sales have remained fairly consistent throughout the year, without any significant spikes or drops. This indicates a stable demand pattern, where growth in revenue is primarily order-driven rather than price fluctuations, suggesting steady customer purchasing behavior.</p></div>''',unsafe_allow_html= True)
+@page.section("trends", "Trends in Order and Revenue over time")
+def trends_section():
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+
+    granularity = st.selectbox("Granularity", [downsample.AUTO] + list(downsample.GRANULARITIES), key = "trends_granularity")
+    # Chart width in pixels caps the number of points sent per trace.
+    width = 1000
+    granularity = downsample.pick_granularity(start_date, end_date, width, granularity)
+
+    def trends_chart():
+        trends = downsample.order_series(cube, df, start_date, end_date, granularity).rename(columns = {"orders":"total_purchase"})
+        subtotal = downsample.reduce(trends["subtotal"], width)
+        purchases = downsample.reduce(trends["total_purchase"], width)
+
+        fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+        fig.add_trace(
+            go.Scatter(
+                x=subtotal.index,
+                y=subtotal,
+                name="Subtotal",
+                line=dict(color="red", width=3)
+            ),
+            secondary_y=False
+        )
+
+        fig.add_trace(
+            go.Scatter(
+                x=purchases.index,
+                y=purchases,
+                name="Total Purchase",
+                line=dict(color="blue", width=3)
+            ),
+            secondary_y=True
+        )
+
+        fig.update_xaxes(title_text=f"Date ({granularity.lower()})")
+        fig.update_yaxes(title_text="Revenue", secondary_y=False)
+        fig.update_yaxes(title_text="Total Purchase", secondary_y=True)
+
+
+        fig.update_layout(
+            legend=dict(x=0.85, y=1),
+            template="plotly_white",
+            height=600,
+            width=width
+        )
+        return fig
+    st.plotly_chart(figcache.figure("trends", figcache.key(figkey, granularity), trends_chart), use_container_width= False)
+
+    st.markdown('''<div class = "summary"><p>The trend analysis shows that orders and revenue move proportionally over time — whenever the number of orders increases, revenue rises accordingly. Overall, sales have remained fairly consistent throughout the year, without any significant spikes or drops. This indicates a stable demand pattern, where growth in revenue is primarily order-driven rather than price fluctuations, suggesting steady customer purchasing behavior.</p></div>''',unsafe_allow_html= True)
 
 #-------------------------------------trend decomposition------------------------------------------
-st.markdown("#### Lets take a look on seasonal Decomposition ")
-import plotly.graph_objs as go
-from plotly.subplots import make_subplots
-from statsmodels.tsa.seasonal import seasonal_decompose
-
-daily = ddf.groupby("event_date")["subtotal"].sum().reset_index()
-daily["event_date"] = pd.to_datetime(daily["event_date"])
-daily.set_index("event_date", inplace = True)
-
-decomposition = seasonal_decompose(daily["subtotal"], model = "additive", period = 7)
-
-fig = make_subplots(rows = 4, cols = 1, shared_xaxes = True,
-subplot_titles = ("Original", "Trend", "Seasonal", "Residual"))
-fig.add_trace(go.Scatter(x = daily.index, y=daily["subtotal"], mode = "lines", name = 'Original', line = dict(color = '#2D2D2D')), row=1 , col=1)
-fig.add_trace(go.Scatter(x = daily.index, y = decomposition.trend, mode = "lines", name = "Trend",line = dict(color = '#D72638')), row =2, col = 1)
-fig.add_trace(go.Scatter(x = daily.index, y = decomposition.seasonal, mode = "lines", name = "Seasonal",line = dict(color = '#3A86FF')), row = 3, col = 1)
-fig.add_trace(go.Scatter(x = daily.index, y = decomposition.resid, mode = "lines", name ="Residual",line = dict(color = '#FFBA08')), row = 4, col = 1)
-fig.update_layout(height = 900, showlegend = True)
-st.plotly_chart(fig, use_container_width= False)
-st.markdown('''<div class = "summary"><p>From the seasonal decomposition, we observe that the seasonal component shows an upward trend between January and May, after which sales exhibit a slight downward or stable pattern. The noise component highlights sharp spikes in sales around specific dates such as 13 Feb, 10 May, 6 June, and 15 June, which align with festivals or weekends, indicating short-term demand surges.
+@page.section("decomposition", "Lets take a look on seasonal Decomposition")
+def decomposition_section():
+    import plotly.graph_objs as go
+    from plotly.subplots import make_subplots
+
+    # Decomposed once over the full history (and updated as days arrive), then sliced.
+    model = timeseries.get_model(cube, frames["generation"])
+    horizon = st.slider("Forecast days", 0, 60, 14)
+    ahead, forecast_seconds = timeseries.forecast(model, horizon)
+
+    def decomposition_chart():
+        daily = timeseries.between(model, start_date, end_date)
+        # One trace per component, each reduced to the chart width on its own.
+        observed, trend, seasonal, resid = (downsample.reduce(daily[part].dropna(), 1000) for part in ["observed", "trend", "seasonal", "resid"])
+
+        fig = make_subplots(rows = 4, cols = 1, shared_xaxes = True,
+        subplot_titles = ("Original", "Trend", "Seasonal", "Residual"))
+        fig.add_trace(go.Scatter(x = observed.index, y=observed, mode = "lines", name = 'Original', line = dict(color = '#2D2D2D')), row=1 , col=1)
+        if horizon:
+            fig.add_trace(go.Scatter(x = ahead.index, y = ahead["upper"], mode = "lines", line = dict(width = 0), showlegend = False, hoverinfo = "skip"), row = 1, col = 1)
+            fig.add_trace(go.Scatter(x = ahead.index, y = ahead["lower"], mode = "lines", line = dict(width = 0), fill = "tonexty", fillcolor = "rgba(114,9,183,0.15)", name = "95% band"), row = 1, col = 1)
+            fig.add_trace(go.Scatter(x = ahead.index, y = ahead["forecast"], mode = "lines", name = "Forecast", line = dict(color = '#7209B7', dash = "dash")), row = 1, col = 1)
+        fig.add_trace(go.Scatter(x = trend.index, y = trend, mode = "lines", name = "Trend",line = dict(color = '#D72638')), row =2, col = 1)
+        fig.add_trace(go.Scatter(x = seasonal.index, y = seasonal, mode = "lines", name = "Seasonal",line = dict(color = '#3A86FF')), row = 3, col = 1)
+        fig.add_trace(go.Scatter(x = resid.index, y = resid, mode = "lines", name ="Residual",line = dict(color = '#FFBA08')), row = 4, col = 1)
+        fig.update_layout(height = 900, showlegend = True)
+        return fig
+    st.plotly_chart(figcache.figure("decomposition", figcache.key(figkey, horizon), decomposition_chart), use_container_width= False)
+    update = "full fit" if model["update_seconds"] is None else f"last update {model['update_seconds'] * 1000:.1f} ms over {model['updated_days']} days"
+    st.caption(f"Decomposition fit {model['fit_seconds'] * 1000:.1f} ms, {update}, {horizon}-day forecast {forecast_seconds * 1000:.1f} ms")
+    st.markdown('''<div class = "summary"><p>From the seasonal decomposition, we observe that the seasonal component shows an upward trend between January and May, after which sales exhibit a slight downward or stable pattern. The noise component highlights sharp spikes in sales around specific dates such as 13 Feb, 10 May, 6 June, and 15 June, which align with festivals or weekends, indicating short-term demand surges.
 This suggests that while the overall sales trend is steady with mild seasonality, special occasions and events act as key demand boosters, creating temporary spikes that businesses can strategically target with promotions.</p></div>''',unsafe_allow_html= True)
+
+#-------------------------------------visitor cohorts and funnel------------------------------------------
+@page.section("cohorts", "How do first-time visitors convert and come back?")
+def cohorts_section():
+    visits = datastore.get_first_visits()
+    if visits is None:
+        st.info("No first_visit table in amin.db; run ingestion.py to load it.")
+        return
+    result = cohorts.cached_analysis(visits, df, start_date, end_date, frames["generation"])
+    funnel = result["funnel"]
+    cols = st.columns(4)
+    cols[0].metric("Visitors", f"{funnel['users'][0]:,}")
+    cols[1].metric("Purchasers", f"{funnel['users'][1]:,}", f"{funnel['users'][1] / max(funnel['users'][0], 1):.1%} converted", delta_color = "off")
+    cols[2].metric("Repeat purchasers", f"{funnel['users'][2]:,}")
+    cols[3].metric("Median days to first purchase", "n/a" if result["median_days"] is None else f"{result['median_days']:.0f}")
+
+    def funnel_chart():
+        fig = px.funnel(funnel, x = "users", y = "stage")
+        fig.update_layout(height = 350, width = 800, template = "plotly_white")
+        return fig
+    st.plotly_chart(figcache.figure("cohort_funnel", figkey, funnel_chart), use_container_width = False)
+
+    def delay_chart():
+        fig = px.bar(result["delays"], x = "delay", y = "users", labels = {"delay":"Time from first visit to first purchase", "users":"Purchasers"}, color_discrete_sequence = ["#1960a2"])
+        fig.update_layout(height = 400, width = 800, template = "plotly_white")
+        return fig
+    st.plotly_chart(figcache.figure("cohort_delay", figkey, delay_chart), use_container_width = False)
+
+    def retention_chart():
+        retention = result["retention"]
+        fig = px.imshow(retention.to_numpy(), x = [f"W{w}" for w in retention.columns], y = retention.index.strftime("%Y-%m-%d"),
+            labels = dict(x = "Weeks since first visit", y = "Cohort (week of first visit)", color = "Purchased"), color_continuous_scale = "Blues", aspect = "auto")
+        fig.update_layout(height = 600, width = 900)
+        return fig
+    st.plotly_chart(figcache.figure("cohort_retention", figkey, retention_chart), use_container_width = False)
 st.markdown("***")
 
 st.header("Conclusion -")
-st.markdown('''<div class = "conclusion"><p>The analysis of the dataset provides a clear understanding of the key trends, regional performance, and product-wise contributions. High-performing pincodes and products have been identified, highlighting areas of strong customer engagement and revenue generation. These insights can guide strategic decisions, optimize resource allocation, and inform targeted marketing efforts. Overall, the findings offer actionable recommendations to improve business performance and support data-driven decision-making.</p></div>''',unsafe_allow_html= True)
\ No newline at end of file
+st.markdown('''<div class = "conclusion"><p>The analysis of the dataset provides a clear understanding of the key trends, regional performance, and product-wise contributions. High-performing pincodes and products have been identified, highlighting areas of strong customer engagement and revenue generation. These insights can guide strategic decisions, optimize resource allocation, and inform targeted marketing efforts. Overall, the findings offer actionable recommendations to improve business performance and support data-driven decision-making.</p></div>''',unsafe_allow_html= True)
+
+paint.caption(page.summary())
+records = instrument.stop_recording()
+if debug:
+    with debug_panel.container():
+        st.caption(f"This run: {len(records)} stages, logged to {instrument.LOG_PATH}")
+        st.dataframe(instrument.breakdown(records), hide_index = True)
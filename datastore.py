@@ -0,0 +1,201 @@
+import sqlite3
+import threading
+import time
+import logging
+import os
+import pandas as pd
+import geo
+import instrument
+import matrix
+import rollup
+import schema
+import sketches
+import snapshot
+import transform
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Process-wide cache for the frames the dashboard reads. Streamlit imports this
+# module once per server process, so every session shares the same entry. The
+# cached frames are read-only: callers filter/copy them, they never mutate them.
+DB_PATH = "amin.db"
+META_TABLE = "ingestion_meta"
+# Columns the dashboard reads; everything else stays on disk.
+SALES_COLUMNS = snapshot.TABLES["sales"]
+ITEM_COLUMNS = [
+    "user_pseudo_id", "event_date", "pincode", "cleaned_city", "source_origin",
+    "Product_name", "Item_variant", "Price", "Quantity", "Revenue", "category",
+]
+
+_lock = threading.Lock()
+_cache = {}
+_stats = {"hits": 0, "misses": 0, "load_seconds": 0.0, "loaded_at": None}
+
+
+#----------------------------------------------------------generation stamp--------------------------------
+def read_generation(con):
+    try:
+        row = con.execute(f"select value from {META_TABLE} where key = 'generation'").fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        return None
+
+
+def generation(db_path=DB_PATH):
+    """Cache key for the current database: file mtime plus the ingestion stamp."""
+    mtime = os.stat(db_path).st_mtime_ns
+    con = sqlite3.connect(db_path)
+    try:
+        return (mtime, read_generation(con))
+    finally:
+        con.close()
+
+
+#----------------------------------------------------------loading--------------------------------
+def _has_table(con, name):
+    return con.execute("select 1 from sqlite_master where type = 'table' and name = ?", (name,)).fetchone() is not None
+
+
+def _select(columns):
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+def _load(db_path):
+    con = sqlite3.connect(db_path)
+    try:
+        # Older amin.db files predate the ingestion transform stage; derive
+        # the missing tables here instead.
+        derived = _has_table(con, "sales_items")
+        with instrument.stage("load.read", table="sales"):
+            sales = pd.read_sql(f"select {_select(SALES_COLUMNS)} from sales" if derived else "select * from sales", con)
+        with instrument.stage("load.clean", rows=len(sales)):
+            sales = transform.clean_sales(sales)
+        if derived:
+            with instrument.stage("load.read", table="sales_items"):
+                items = pd.read_sql(f"select {_select(ITEM_COLUMNS)} from sales_items", con, parse_dates=["event_date"])
+        else:
+            with instrument.stage("load.reshape", rows=len(sales)):
+                items = transform.build_items(sales)
+        if _has_table(con, rollup.TABLE):
+            with instrument.stage("load.read", table=rollup.TABLE):
+                daily = pd.read_sql(f"select * from {rollup.TABLE}", con)
+        else:
+            with instrument.stage("load.rollup"):
+                daily = rollup.build_rollup(sales, items)
+        sketch = None
+        if _has_table(con, sketches.TABLE):
+            with instrument.stage("load.read", table=sketches.TABLE):
+                sketch = pd.read_sql(f"select * from {sketches.TABLE}", con)
+    finally:
+        con.close()
+    return _finish(sales, items, daily, sketch)
+
+
+def _load_snapshot(directory, manifest):
+    sales = transform.clean_sales(snapshot.read_table("sales", SALES_COLUMNS, directory, manifest))
+    items = snapshot.read_table("sales_items", ITEM_COLUMNS, directory, manifest)
+    items["event_date"] = pd.to_datetime(items["event_date"])
+    daily = snapshot.read_table(rollup.TABLE, None, directory, manifest)
+    sketch = snapshot.read_table(sketches.TABLE, None, directory, manifest) if sketches.TABLE in manifest["tables"] else None
+    return _finish(sales, items, daily, sketch)
+
+
+def _finish(sales, items, daily, sketch=None):
+    # Every session shares these frames, so they are compacted once here.
+    with instrument.stage("load.compact"):
+        sales, sales_report = schema.compact(sales)
+        items, items_report = schema.compact(items)
+        daily, daily_report = schema.compact(daily)
+    with instrument.stage("load.index_rollup"):
+        indexed = rollup.index_rollup(daily)
+    # Sketches live next to the rollup dimensions; databases from before they
+    # were materialized get them built here.
+    with instrument.stage("load.sketches"):
+        if sketch is None or sketch.empty:
+            sketch = sketches.build_sketches(sales)
+        indexed[sketches.TABLE] = sketches.index_sketches(sketch)
+    with instrument.stage("load.matrix"):
+        sold = matrix.build(items)
+    return {
+        "sales": sales,
+        "items": items,
+        "rollup": indexed,
+        "matrix": sold,
+        "memory": schema.memory_report({"sales": sales_report, "items": items_report, rollup.TABLE: daily_report}),
+    }
+
+
+def _cached(name, key, loader):
+    with _lock:
+        entry = _cache.get(name)
+        if entry is not None and entry["generation"] == key:
+            _stats["hits"] += 1
+            return entry["value"]
+        start = time.perf_counter()
+        with instrument.stage("load", source=name):
+            value = loader()
+        elapsed = time.perf_counter() - start
+        _cache[name] = {"generation": key, "value": value}
+        _stats["misses"] += 1
+        _stats["load_seconds"] = elapsed
+        _stats["loaded_at"] = time.time()
+        logging.info("Loaded %s (generation %s) in %.2fs", name, key, elapsed)
+        return value
+
+
+def get_frames(db_path=DB_PATH, snapshot_dir=snapshot.SNAPSHOT_DIR):
+    """Return the shared sales/items/rollup frames and their generation, reloading only when it changes.
+
+    A columnar snapshot is preferred when it was written for the current
+    amin.db generation (or when it is the only data shipped).
+    """
+    key = generation(db_path) if os.path.exists(db_path) else None
+    if key is None:
+        manifest = snapshot.read_manifest(snapshot_dir)
+        key = None if manifest is None else ("generation", manifest["generation"])
+    elif key[1] is not None:
+        # Keyed on the stamp alone, so a snapshot written after amin.db was
+        # loaded does not load the same generation a second time.
+        key = ("generation", key[1])
+
+    def loader():
+        manifest = snapshot.read_manifest(snapshot_dir)
+        if manifest is not None and (key is None or manifest["generation"] == key[1]):
+            return dict(_load_snapshot(snapshot_dir, manifest), generation=key)
+        return dict(_load(db_path), generation=key)
+    return _cached(db_path, key, loader)
+
+
+def get_first_visits(db_path=DB_PATH):
+    """Return each visitor's first visit day from first_visit, or None when amin.db lacks it."""
+    if not os.path.exists(db_path):
+        return None
+    def loader():
+        con = sqlite3.connect(db_path)
+        try:
+            if not _has_table(con, "first_visit"):
+                return None
+            visits = pd.read_sql(
+                "select user_pseudo_id, min(event_date) as first_visit from first_visit "
+                "where user_pseudo_id is not null group by user_pseudo_id", con)
+        finally:
+            con.close()
+        visits["first_visit"] = pd.to_datetime(visits["first_visit"])
+        return visits
+    return _cached(f"{db_path}:first_visit", generation(db_path), loader)
+
+
+def get_geo(csv_path=geo.GEO_PATH):
+    """Return the deduplicated pincode store, rebuilding only when the csv changes."""
+    return _cached(csv_path, os.stat(csv_path).st_mtime_ns, lambda: geo.load_store(csv_path))
+
+
+def cache_stats():
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return dict(_stats, hit_rate = _stats["hits"] / total if total else 0.0)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import rollup
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Time-series charts send at most about one point per horizontal pixel. The
+# bucket size (hour/day/week/month) is picked from the date range and the
+# chart width; whatever is still wider than the chart is reduced with
+# Largest-Triangle-Three-Buckets, which keeps the visual peaks and troughs.
+GRANULARITIES = {"Hour": "h", "Day": "D", "Week": "W-MON", "Month": "MS"}
+AUTO = "Auto"
+
+
+#----------------------------------------------------------granularity--------------------------------
+def buckets(start, end, granularity):
+    """Number of granularity buckets the inclusive [start, end] day range spans."""
+    days = (pd.to_datetime(end) - pd.to_datetime(start)).days + 1
+    return {"Hour": days * 24, "Day": days, "Week": -(-days // 7), "Month": -(-days // 30)}[granularity]
+
+
+def pick_granularity(start, end, width, choice=AUTO):
+    """The finest granularity with no more buckets than `width` pixels, unless one was chosen."""
+    if choice != AUTO:
+        return choice
+    for granularity in GRANULARITIES:
+        if buckets(start, end, granularity) <= width:
+            return granularity
+    return "Month"
+
+
+def order_series(indexed, sales, start, end, granularity):
+    """Orders and subtotal per bucket over [start, end].
+
+    Day and coarser buckets are summed from the daily rollup; hours come from
+    the order timestamps of the cleaned sales frame.
+    """
+    if granularity == "Hour":
+        days = sales["event_date"]
+        orders = sales.loc[(days >= pd.to_datetime(start)) & (days <= pd.to_datetime(end)), ["new_event_timestamp", "subtotal"]]
+        hours = pd.to_datetime(orders["new_event_timestamp"], errors="coerce").dt.floor("h")
+        series = orders.groupby(hours)["subtotal"].agg(orders="size", subtotal="sum")
+    else:
+        series = rollup.daily(indexed, start, end)[["orders", "subtotal"]]
+        if granularity != "Day":
+            series = series.resample(GRANULARITIES[granularity]).sum()
+    series = series.astype("float64")
+    return series.rename_axis("event_date")
+
+
+#----------------------------------------------------------downsampling--------------------------------
+def lttb(x, y, threshold):
+    """Indices of the `threshold` points Largest-Triangle-Three-Buckets keeps from (x, y)."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    x = x.astype(np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    # The first and last points are always kept; the rest split into threshold-2 buckets.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    chosen = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex.
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[chosen] - avg_x) * (y[lo:hi] - y[chosen]) - (x[chosen] - x[lo:hi]) * (avg_y - y[chosen]))
+        chosen = lo + int(area.argmax())
+        keep[i + 1] = chosen
+    return keep
+
+
+def minmax(y, buckets):
+    """Indices of the min and max of each of `buckets` equal slices of y, in order."""
+    n = len(y)
+    if 2 * buckets >= n:
+        return np.arange(n)
+    bucket = np.linspace(0, buckets, n, endpoint=False).astype(np.int64)
+    grouped = pd.Series(np.nan_to_num(np.asarray(y, dtype=np.float64))).groupby(bucket)
+    keep = np.concatenate([grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy()])
+    return np.unique(keep)
+
+
+def reduce(series, width, method="lttb"):
+    """Downsample a Series to about `width` points; shorter series pass through."""
+    if len(series) <= width:
+        return series
+    if method == "minmax":
+        keep = minmax(series.to_numpy(), max(width // 2, 1))
+    else:
+        keep = lttb(series.index.to_numpy(), series.to_numpy(), width)
+    return series.iloc[keep]
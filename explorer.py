@@ -0,0 +1,85 @@
+import sqlite3
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Line-item explorer: filtering, sorting and paging run in SQLite against
+# sales_items, so only the visible page is read and sent to the grid. When
+# only a snapshot is shipped, or amin.db predates the materialized sales_items
+# table, the same query runs over the cached items frame.
+TABLE = "sales_items"
+COLUMNS = [
+    "event_date", "pincode", "cleaned_city", "source_origin", "category",
+    "Product_name", "Item_variant", "Price", "Quantity", "Revenue", "user_pseudo_id",
+]
+# Text filters match as case-insensitive substrings; pincode matches a prefix.
+TEXT_FILTERS = ["Product_name", "category", "cleaned_city", "source_origin", "Item_variant"]
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+#----------------------------------------------------------sql--------------------------------
+def _like(text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _where(start, end, filters):
+    clauses = ["event_date between ? and ?"]
+    params = [str(pd.to_datetime(start).date()), str(pd.to_datetime(end).date())]
+    for column, text in filters.items():
+        if not text:
+            continue
+        if column == "pincode":
+            clauses.append("cast(pincode as text) like ?")
+            params.append(f"{text.strip()}%")
+        elif column in TEXT_FILTERS:
+            clauses.append(f'"{column}" like ? escape \'\\\'')
+            params.append(_like(text.strip()))
+        else:
+            raise ValueError(f"Unknown filter column {column!r}")
+    return " and ".join(clauses), params
+
+
+def page_sql(con, start, end, filters=None, sort="event_date", descending=True, page=0, page_size=50):
+    """Return (rows of page `page`, total matching rows) from sales_items."""
+    if sort not in COLUMNS:
+        raise ValueError(f"Unknown sort column {sort!r}")
+    where, params = _where(start, end, filters or {})
+    total = con.execute(f"select count(*) from {TABLE} where {where}", params).fetchone()[0]
+    select = ", ".join(f'"{c}"' for c in COLUMNS)
+    # rowid breaks ties so pages do not overlap when the sort key repeats.
+    order = f'"{sort}" {"desc" if descending else "asc"}, rowid'
+    rows = pd.read_sql(
+        f"select {select} from {TABLE} where {where} order by {order} limit ? offset ?",
+        con, params=params + [page_size, page * page_size],
+    )
+    return rows, total
+
+
+def connect(db_path):
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+
+
+def has_table(con):
+    return con.execute("select 1 from sqlite_master where type = 'table' and name = ?", (TABLE,)).fetchone() is not None
+
+
+#----------------------------------------------------------frame fallback--------------------------------
+def page_frame(items, start, end, filters=None, sort="event_date", descending=True, page=0, page_size=50):
+    """page_sql() over an in-memory items frame."""
+    if sort not in COLUMNS:
+        raise ValueError(f"Unknown sort column {sort!r}")
+    days = items["event_date"]
+    mask = (days >= pd.to_datetime(start)) & (days <= pd.to_datetime(end))
+    for column, text in (filters or {}).items():
+        if not text:
+            continue
+        if column == "pincode":
+            mask &= items["pincode"].astype(str).str.startswith(text.strip())
+        elif column in TEXT_FILTERS:
+            mask &= items[column].astype(str).str.contains(text.strip(), case=False, regex=False)
+        else:
+            raise ValueError(f"Unknown filter column {column!r}")
+    matched = items.loc[mask, COLUMNS]
+    ordered = matched.sort_values(sort, ascending=not descending, kind="stable")
+    return ordered.iloc[page * page_size:(page + 1) * page_size].reset_index(drop=True), len(matched)
@@ -0,0 +1,83 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+import instrument
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Process-wide LRU of built Plotly figures. A figure is keyed by its chart id
+# plus a hash of everything it was built from (date range, data generation,
+# widget values), so a rerun only rebuilds the charts whose inputs changed.
+# Entries are sized by their JSON payload; the least recently used figures
+# are evicted once the total passes MAX_BYTES.
+MAX_BYTES = 64 * 2**20
+
+_lock = threading.Lock()
+_figures = OrderedDict()
+_bytes = 0
+_stats = {}
+
+
+#----------------------------------------------------------cache--------------------------------
+def key(*parts):
+    """Hash the inputs a figure depends on into a short cache key."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def _chart_stats(chart):
+    return _stats.setdefault(chart, {"hits": 0, "misses": 0, "build_seconds": 0.0})
+
+
+def figure(chart, inputs, build):
+    """Return the figure of `chart` for `inputs` (a key()), calling build() only on a miss.
+
+    Cached figures are shared by every session, so callers must not modify them.
+    """
+    global _bytes
+    with _lock:
+        stats = _chart_stats(chart)
+        entry = _figures.get((chart, inputs))
+        if entry is not None:
+            _figures.move_to_end((chart, inputs))
+            stats["hits"] += 1
+            return entry["figure"]
+    start = time.perf_counter()
+    with instrument.stage(f"figure:{chart}"):
+        fig = build()
+    elapsed = time.perf_counter() - start
+    size = len(fig.to_json())
+    with _lock:
+        stats["misses"] += 1
+        stats["build_seconds"] = elapsed
+        previous = _figures.pop((chart, inputs), None)
+        if previous is not None:
+            _bytes -= previous["bytes"]
+        _figures[(chart, inputs)] = {"figure": fig, "bytes": size}
+        _bytes += size
+        while _bytes > MAX_BYTES and len(_figures) > 1:
+            (evicted, _), old = _figures.popitem(last=False)
+            _bytes -= old["bytes"]
+            logging.info("Evicted %s figure (%d bytes)", evicted, old["bytes"])
+    return fig
+
+
+def cache_stats():
+    """Per-chart hits, misses and last build time, plus the cache's current size."""
+    with _lock:
+        rows = [dict(chart=chart, **stats) for chart, stats in _stats.items()]
+        size = {"entries": len(_figures), "bytes": _bytes}
+    table = pd.DataFrame(rows, columns=["chart", "hits", "misses", "build_seconds"])
+    calls = table["hits"] + table["misses"]
+    table["hit_rate"] = (table["hits"] / calls.where(calls > 0)).fillna(0.0)
+    return table, size
+
+
+def clear_cache():
+    global _bytes
+    with _lock:
+        _figures.clear()
+        _stats.clear()
+        _bytes = 0
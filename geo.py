@@ -0,0 +1,100 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# The pincode directory lists one row per post office, so a pincode repeats
+# and some rows carry "NA" or zero coordinates. The store keeps one point per
+# pincode, sorted, and joins by binary search on the integer pincode.
+GEO_PATH = "pincode_with_lat-long.csv"
+GEO_COLUMNS = {"Pincode": "pincode", "Latitude": "Latitude", "Longitude": "Longitude"}
+# Map aggregation choices: None is one marker per pincode, numbers are grid
+# cell sizes in degrees (0.01 is roughly 1 km around Bangalore).
+GRIDS = {"Pincode": None, "1 km grid": 0.01, "5 km grid": 0.05}
+
+Store = namedtuple("Store", ["pincode", "lat", "lon"])
+
+
+#----------------------------------------------------------store--------------------------------
+def build_store(geo):
+    """Collapse a Pincode/Latitude/Longitude frame to one median point per valid pincode."""
+    geo = geo.rename(columns=GEO_COLUMNS)[list(GEO_COLUMNS.values())].apply(pd.to_numeric, errors="coerce")
+    valid = (
+        geo["pincode"].notna()
+        & geo["Latitude"].between(-90, 90) & geo["Longitude"].between(-180, 180)
+        & (geo["Latitude"] != 0) & (geo["Longitude"] != 0)
+    )
+    points = geo[valid].astype({"pincode": "int64"}).groupby("pincode").median()
+    return Store(
+        points.index.to_numpy(),
+        points["Latitude"].to_numpy(np.float64),
+        points["Longitude"].to_numpy(np.float64),
+    )
+
+
+def load_store(csv_path=GEO_PATH):
+    return build_store(pd.read_csv(csv_path, usecols=list(GEO_COLUMNS), dtype=str))
+
+
+def locate(store, pincodes):
+    """Latitude and longitude arrays for pincodes; NaN where the store has no point."""
+    pincodes = pd.to_numeric(pd.Series(pincodes), errors="coerce").to_numpy(np.float64)
+    missing = np.full(len(pincodes), np.nan)
+    if len(store.pincode) == 0:
+        return missing, missing.copy()
+    keys = np.nan_to_num(pincodes, nan=-1).astype(np.int64)
+    pos = np.searchsorted(store.pincode, keys).clip(max=len(store.pincode) - 1)
+    found = store.pincode[pos] == keys
+    return np.where(found, store.lat[pos], missing), np.where(found, store.lon[pos], missing)
+
+
+#----------------------------------------------------------map points--------------------------------
+def pincode_points(items, store):
+    """One row per pincode: Quantity/Revenue totals, top product by quantity and its point."""
+    sold = items.groupby(["pincode", "Product_name"], observed=True)[["Quantity", "Revenue"]].sum().reset_index()
+    top = sold.sort_values("Quantity", ascending=False).drop_duplicates("pincode").set_index("pincode")["Product_name"]
+    points = sold.groupby("pincode", observed=True)[["Quantity", "Revenue"]].sum()
+    points["Product_name"] = top.reindex(points.index).astype(str)
+    return place(points.reset_index(), store)
+
+
+def place(points, store):
+    """Add Latitude/Longitude to per-pincode rows, dropping pincodes the store cannot place."""
+    points = points.assign(pincode=points["pincode"].astype("int64"))
+    points["Latitude"], points["Longitude"] = locate(store, points["pincode"])
+    return points.dropna(subset=["Latitude", "Longitude"])
+
+
+def grid_points(points, cell):
+    """Bin pincode points into cell x cell degree squares, centred on their revenue-weighted mean."""
+    columns = ["pincode", "Product_name", "Quantity", "Revenue", "pincodes", "Latitude", "Longitude"]
+    if cell is None:
+        return points
+    if points.empty:
+        return pd.DataFrame(columns=columns)
+    points = points.assign(
+        row=np.floor(points["Latitude"] / cell).astype("int64"),
+        col=np.floor(points["Longitude"] / cell).astype("int64"),
+        lat_w=points["Latitude"] * points["Revenue"],
+        lon_w=points["Longitude"] * points["Revenue"],
+    )
+    cells = points.groupby(["row", "col"]).agg(
+        Quantity=("Quantity", "sum"),
+        Revenue=("Revenue", "sum"),
+        lat_w=("lat_w", "sum"),
+        lon_w=("lon_w", "sum"),
+        pincodes=("pincode", "size"),
+    )
+    # Top product of the cell is the one from its best-selling pincode.
+    best = points.sort_values("Quantity", ascending=False).drop_duplicates(["row", "col"]).set_index(["row", "col"]).reindex(cells.index)
+    cells["Product_name"] = best["Product_name"]
+    extra = pd.Series(np.where(cells["pincodes"] > 1, " +" + (cells["pincodes"] - 1).astype(str), ""), index=cells.index, dtype=str)
+    cells["pincode"] = best["pincode"].astype(str) + extra
+    # Cells without revenue fall back to their geometric centre.
+    weighted = cells["Revenue"].to_numpy() != 0
+    rows, cols = (cells.index.get_level_values(level).to_numpy() for level in ("row", "col"))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cells["Latitude"] = np.where(weighted, cells["lat_w"] / cells["Revenue"], (rows + 0.5) * cell)
+        cells["Longitude"] = np.where(weighted, cells["lon_w"] / cells["Revenue"], (cols + 0.5) * cell)
+    return cells.reset_index()[columns]
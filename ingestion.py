@@ -1,9 +1,26 @@
 from google.cloud import bigquery
+import argparse
+import itertools
+import queue
 import time
 import logging
-from sqlalchemy import create_engine
 import os
+import sqlite3
+import threading
 import warnings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import instrument
+import rollup
+import sketches
+import snapshot
+import transform
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 
 
@@ -16,44 +33,581 @@ table_query = {
     "sales": "select * from amintiri-data-analytics.Amintiri_GA4.t_total_sales",
     "first_visit": "select * from amintiri-data-analytics.Amintiri_GA4.t_first_visit"
 }
+# Column each table's high-watermark is kept on. Incremental runs re-fetch every
+# row at or after the watermark and replace that range locally, so the last
+# (possibly partial) day is always brought up to date.
+table_watermark = {
+    "sales": "event_date",
+    "first_visit": "event_date"
+}
+# Rows per BigQuery result page and per executemany call. Peak memory is
+# bounded by one page, whatever the table size.
+batch_size = 20_000
+# Tables fetched from BigQuery at once. Writes still go through one SQLite
+# connection on the main thread, fed by a bounded queue.
+max_workers = 4
+# Every run is built into a copy of the live database and renamed over it once
+# it validates, so readers see the old file or the new one, never a half-written
+# table. The served file is kept out of WAL mode: it has no -wal/-shm sidecars
+# that could be left behind by, or applied to, the wrong file.
+db_path = "amin.db"
+# Attempts per scheduled refresh; the wait between them doubles from backoff
+# seconds up to max_backoff.
+retries = 3
+backoff = 30
+max_backoff = 600
+# Windows cannot rename over a file another process has open, so the swap
+# waits up to this many seconds for readers of amin.db to close it.
+swap_timeout = 30
 
 
 
 #-------------------------------------------------------------authentication--------------------------------------------
-def authentication(path, query):
-    try:
+def authentication(path, client=None):
+    if client is None:
         os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = path
         client = bigquery.Client()
-        query_data = client.query(query)
-        dataframe = query_data.to_dataframe()
-        logging.info("Data successfully authenticated and stored into dataframe")
-        return dataframe
-    except Exception as e:
-        logging.exception("An error occured during authentication")
+    return client
+
+
+def fetch(client, query, job_config=None, table_name=None):
+    # Yields one DataFrame per result page instead of materializing the whole
+    # result set with to_dataframe().
+    with instrument.stage("bigquery.query", table = table_name) as record:
+        rows = client.query(query, job_config = job_config).result(page_size = batch_size)
+        record["rows"] = rows.total_rows
+    logging.info("Query finished, streaming %s rows", rows.total_rows)
+    pages = iter(rows.to_dataframe_iterable())
+    while True:
+        with instrument.stage("bigquery.to_dataframe", table = table_name) as record:
+            df = next(pages, None)
+            record["rows"] = 0 if df is None else len(df)
+        if df is None:
+            return
+        yield df
 
 
 #----------------------------------------------------------local database --------------------------------
-def load(table_name, df):
+def connect(target):
+    con = sqlite3.connect(target, isolation_level = None)
+    con.execute("pragma journal_mode = wal")
+    con.execute("pragma synchronous = normal")
+    return con
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def to_rows(df):
+    # sqlite3 only adapts plain Python scalars; dates/timestamps go in as ISO text.
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype.kind == "M" or str(df[column].dtype) in ("dbdate", "dbtime"):
+            df[column] = df[column].astype(str).where(df[column].notna(), None)
+    return df.astype(object).where(df.notna(), None).itertuples(index = False, name = None)
+
+
+def insert_frame(con, table_name, df):
+    # Plain executemany so the rows join the caller's open transaction
+    # (DataFrame.to_sql commits on its own).
+    columns = ", ".join(f'"{c}"' for c in df.columns)
+    marks = ", ".join("?" for _ in df.columns)
+    with instrument.stage("sqlite.insert", table = table_name, rows = len(df)):
+        rows = to_rows(df)
+        while True:
+            chunk = list(itertools.islice(rows, batch_size))
+            if not chunk:
+                break
+            con.executemany(f'insert into "{table_name}" ({columns}) values ({marks})', chunk)
+
+
+def staging_name(table_name):
+    return f"{table_name}__staging"
+
+
+def stage(con, table_name, df):
+    # Batches land in a staging table; nothing touches the live table until finalize().
+    staging = staging_name(table_name)
+    if not table_columns(con, staging):
+        con.execute(pd.io.sql.get_schema(df, staging, con = con))
+    con.execute("begin")
+    insert_frame(con, staging, df)
+    con.execute("commit")
+
+
+def table_columns(con, table_name):
+    return [row[1] for row in con.execute(f'pragma table_info("{table_name}")')]
+
+
+#----------------------------------------------------------transform --------------------------------
+def derive_sales(df, subtotal_mean=None):
+    sales = transform.clean_sales(df.copy(), subtotal_mean = subtotal_mean)
+    items = transform.build_items(sales)
+    daily = rollup.build_rollup(sales, items)
+    sketch = sketches.build_sketches(sales)
+    for frame in (items, daily, sketch):
+        frame["event_date"] = frame["event_date"].dt.strftime("%Y-%m-%d")
+    return items, daily, sketch
+
+
+def create_derived(con):
+    con.execute(pd.io.sql.get_schema(pd.DataFrame(columns = list(transform.ITEM_DTYPES)), "sales_items", con = con, dtype = transform.ITEM_DTYPES).replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS"))
+    for column in transform.ITEM_INDEXES:
+        con.execute(f'create index if not exists ix_sales_items_{column} on sales_items ("{column}")')
+    con.execute(pd.io.sql.get_schema(pd.DataFrame(columns = list(rollup.ROLLUP_DTYPES)), rollup.TABLE, con = con, dtype = rollup.ROLLUP_DTYPES).replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS"))
+    con.execute(f"create index if not exists ix_{rollup.TABLE} on {rollup.TABLE} ({', '.join(rollup.ROLLUP_INDEX)})")
+    con.execute(pd.io.sql.get_schema(pd.DataFrame(columns = list(sketches.SKETCH_DTYPES)), sketches.TABLE, con = con, dtype = sketches.SKETCH_DTYPES).replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS"))
+    con.execute(f"create index if not exists ix_{sketches.TABLE} on {sketches.TABLE} ({', '.join(sketches.SKETCH_INDEX)})")
+
+
+@instrument.timed("transform_sales")
+def transform_sales(con, since=None):
+    """Rebuild sales_items and daily_rollup from `sales` rows at/after since (all rows if None).
+
+    Runs inside the caller's transaction. `sales` is read back in chunks; each
+    chunk's rollup is a partial sum, merged per (day, dimension, member) at the end.
+    """
+    start = time.time()
+    create_derived(con)
+    subtotal_mean = con.execute("select avg(subtotal) from sales").fetchone()[0]
+    where, params = ("where event_date >= ?", (since,)) if since is not None else ("", ())
+    since_day = pd.to_datetime(since).strftime("%Y-%m-%d") if since is not None else ""
+    con.execute("delete from sales_items where event_date >= ?", (since_day,))
+    con.execute(f"delete from {rollup.TABLE} where event_date >= ?", (since_day,))
+    con.execute(f"delete from {sketches.TABLE} where event_date >= ?", (since_day,))
+    con.execute(f"create temp table if not exists rollup_partial as select * from {rollup.TABLE} where 0")
+    con.execute(f"create temp table if not exists sketch_partial as select * from {sketches.TABLE} where 0")
+    con.execute("delete from rollup_partial")
+    con.execute("delete from sketch_partial")
+    items_rows = 0
+    for chunk in pd.read_sql(f"select * from sales {where}", con, params = params, chunksize = batch_size):
+        items, daily, sketch = derive_sales(chunk, subtotal_mean)
+        insert_frame(con, "sales_items", items)
+        insert_frame(con, "rollup_partial", daily)
+        insert_frame(con, "sketch_partial", sketch)
+        items_rows += len(items)
+    measures = ", ".join(f"sum({m})" for m in rollup.MEASURES)
+    con.execute(f"insert into {rollup.TABLE} select event_date, dimension, member, {measures} from rollup_partial group by event_date, dimension, member")
+    # HyperLogLog registers merge by max, quantile bucket counts by sum.
+    con.execute(f"insert into {sketches.TABLE} select event_date, dimension, member, kind, slot, case kind when 'hll' then max(value) else sum(value) end from sketch_partial group by event_date, dimension, member, kind, slot")
+    logging.info("sales_items (%d rows), %s and %s rebuilt since %s in %.2fs", items_rows, rollup.TABLE, sketches.TABLE, since or "the beginning", time.time() - start)
+
+
+#----------------------------------------------------------incremental --------------------------------
+def read_meta(con, key):
+    con.execute("create table if not exists ingestion_meta (key text primary key, value text)")
+    row = con.execute("select value from ingestion_meta where key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def write_meta(con, key, value):
+    con.execute("create table if not exists ingestion_meta (key text primary key, value text)")
+    con.execute("insert or replace into ingestion_meta values (?, ?)", (key, value))
+
+
+def save_watermark(con, table_name):
+    column = table_watermark[table_name]
+    watermark = con.execute(f'select max("{column}") from "{table_name}"').fetchone()[0]
+    if watermark is not None:
+        write_meta(con, f"watermark:{table_name}", str(watermark))
+
+
+def sample_rss(job_stats):
+    # Current RSS (not the process high-water mark), sampled as each table's
+    # pages are written, so every table reports its own peak.
+    rss = instrument.rss_mb()
+    if rss is not None:
+        job_stats["rss_peak"] = max(job_stats["rss_peak"], rss)
+
+
+def report(table_name, job_stats):
+    rows, elapsed = job_stats["rows"], time.time() - job_stats["start"]
+    rss = "n/a" if job_stats["rss_start"] is None else f"{job_stats['rss_peak']:.0f} MB (+{job_stats['rss_peak'] - job_stats['rss_start']:.0f} MB)"
+    logging.info("%s: %d rows in %.2fs (%.0f rows/sec), peak RSS while loading %s", table_name, rows, elapsed, rows / elapsed if elapsed else 0, rss)
+
+
+#----------------------------------------------------------fetch jobs --------------------------------
+# watermark is None for a full refresh.
+Job = namedtuple("Job", ["table_name", "query", "watermark"])
+
+
+class SchemaChanged(Exception):
+    pass
+
+
+def plan(con, table_name, full):
+    """Incremental job when the table and its watermark exist locally, otherwise a full refresh."""
+    watermark = None if full else read_meta(con, f"watermark:{table_name}")
+    if watermark is not None and not table_columns(con, table_name):
+        watermark = None
+    return Job(table_name, table_query[table_name], watermark)
+
+
+def offer(out, item, cancel):
+    # Blocks like out.put() while the writer keeps up, but gives up once it is cancelled.
+    while not cancel.is_set():
+        try:
+            out.put(item, timeout = 0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def fetch_worker(job, client, out, cancel):
+    # Runs on the pool; only produces frames, never touches SQLite.
+    start = time.time()
+    try:
+        job_config, query = None, job.query
+        if job.watermark is not None:
+            column = table_watermark[job.table_name]
+            job_config = bigquery.QueryJobConfig(query_parameters = [bigquery.ScalarQueryParameter("watermark", "STRING", job.watermark)])
+            query = f"select * from ({job.query}) where cast({column} as string) >= @watermark"
+        for df in fetch(client, query, job_config, job.table_name):
+            if not offer(out, ("batch", job, df), cancel):
+                return
+        offer(out, ("done", job, time.time() - start), cancel)
+    except Exception as e:
+        offer(out, ("failed", job, e), cancel)
+
+
+@instrument.timed("finalize")
+def finalize(con, job):
+    """Swap or merge the staged rows into the live table and rebuild derived tables, in one transaction."""
+    table_name, staging = job.table_name, staging_name(job.table_name)
+    staged = table_columns(con, staging)
+    if not staged:
+        if job.watermark is None:
+            logging.info("%s: query returned no rows, keeping the existing table", table_name)
+        return
+    if job.watermark is not None and sorted(staged) != sorted(table_columns(con, table_name)):
+        con.execute(f'drop table "{staging}"')
+        raise SchemaChanged(f"{table_name} columns changed upstream")
+    con.execute("begin")
+    try:
+        if job.watermark is None:
+            con.execute(f'drop table if exists "{table_name}"')
+            con.execute(f'alter table "{staging}" rename to "{table_name}"')
+        else:
+            column = table_watermark[table_name]
+            columns = ", ".join(f'"{c}"' for c in staged)
+            con.execute(f'delete from "{table_name}" where "{column}" >= ?', (job.watermark,))
+            con.execute(f'insert into "{table_name}" ({columns}) select {columns} from "{staging}"')
+            con.execute(f'drop table "{staging}"')
+        if table_name == "sales":
+            transform_sales(con, since = job.watermark)
+        save_watermark(con, table_name)
+        con.execute("commit")
+    except Exception:
+        con.execute("rollback")
+        raise
+
+
+def run_jobs(con, jobs, client):
+    """Fetch every job concurrently and apply the results through this one connection.
+
+    Each table commits (or fails) on its own; a failed incremental job is retried
+    as a full refresh. Returns the tables that could not be loaded.
+    """
+    out = queue.Queue(maxsize = 2 * max_workers)
+    stats = {}
+    failed = []
+    cancel = threading.Event()
+    with ThreadPoolExecutor(max_workers = max_workers) as pool:
+        def submit(job):
+            con.execute(f'drop table if exists "{staging_name(job.table_name)}"')
+            rss = instrument.rss_mb()
+            stats[job] = {"rows": 0, "write": 0.0, "start": time.time(), "rss_start": rss, "rss_peak": rss}
+            pool.submit(fetch_worker, job, client, out, cancel)
+
+        try:
+            for job in jobs:
+                submit(job)
+            while stats:
+                kind, job, payload = out.get()
+                if kind == "batch":
+                    # Keep draining a job whose write failed so its worker never blocks.
+                    if "error" not in stats[job]:
+                        start = time.time()
+                        try:
+                            stage(con, job.table_name, payload)
+                            stats[job]["rows"] += len(payload)
+                            sample_rss(stats[job])
+                        except Exception as e:
+                            stats[job]["error"] = e
+                        stats[job]["write"] += time.time() - start
+                    continue
+                job_stats = stats.pop(job)
+                mode = "full refresh" if job.watermark is None else f"incremental since {job.watermark}"
+                try:
+                    if kind == "failed":
+                        raise payload
+                    if "error" in job_stats:
+                        raise job_stats["error"]
+                    start = time.time()
+                    finalize(con, job)
+                    sample_rss(job_stats)
+                    logging.info("%s (%s): fetch %.2fs, write %.2fs, finalize %.2fs", job.table_name, mode, payload, job_stats["write"], time.time() - start)
+                    report(f"{job.table_name} ({mode})", job_stats)
+                except Exception as e:
+                    con.execute(f'drop table if exists "{staging_name(job.table_name)}"')
+                    if job.watermark is not None:
+                        logging.warning("%s (%s) failed: %s; falling back to a full refresh", job.table_name, mode, e)
+                        submit(job._replace(watermark = None))
+                    else:
+                        logging.error("%s (%s) failed: %s", job.table_name, mode, e)
+                        failed.append(job.table_name)
+        finally:
+            # If the loop above raised, workers may be blocked on the full
+            # queue; release them before the executor waits for them.
+            cancel.set()
+            while True:
+                try:
+                    out.get_nowait()
+                except queue.Empty:
+                    break
+    logging.info("Process peak RSS so far: %s MB", "n/a" if peak_rss_mb() is None else f"{peak_rss_mb():.0f}")
+    return failed
+
+
+#----------------------------------------------------------generation stamp --------------------------------
+def stamp_generation(target):
+    # The dashboard's data cache keys on this stamp (plus the file mtime), so a
+    # swapped-in database is picked up on the next rerun.
+    generation = str(time.time_ns())
+    con = sqlite3.connect(target)
+    with con:
+        write_meta(con, "generation", generation)
+    con.close()
+    return generation
+
+
+def write_snapshot(generation, format):
     try:
-        engine = create_engine('sqlite:///amin.db')
         start = time.time()
-        df.to_sql(table_name, con = engine, if_exists= 'replace', index = False)
-        end = time.time()
-        logging.info("Database Successfully created: in",end-start)
+        con = sqlite3.connect(db_path)
+        tables = snapshot.write_snapshot(con, generation, format = format)
+        con.close()
+        logging.info("%s snapshot written in %.2fs: %s", format, time.time() - start, tables)
     except Exception as e:
-        logging.exception("An error occured during loading")
+        logging.exception("An error occured while writing the snapshot")
+
+
+#----------------------------------------------------------atomic swap --------------------------------
+class InvalidBuild(Exception):
+    pass
+
+
+def building_path():
+    return f"{db_path}.building"
+
+
+def remove_database(target):
+    for name in (target, f"{target}-wal", f"{target}-shm", f"{target}-journal"):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+def leave_wal(target):
+    """Checkpoint a WAL-mode database into its main file and switch it to a rollback journal.
+
+    Returns False when open readers kept it in WAL mode; its WAL is empty by then.
+    """
+    con = sqlite3.connect(target, isolation_level = None)
+    try:
+        if con.execute("pragma journal_mode").fetchone()[0] != "wal":
+            return True
+        if con.execute("pragma wal_checkpoint(truncate)").fetchone()[0]:
+            raise InvalidBuild(f"could not checkpoint {target}, a reader is in the middle of a transaction")
+        try:
+            return con.execute("pragma journal_mode = delete").fetchone()[0] == "delete"
+        except sqlite3.OperationalError:
+            return False
+    finally:
+        con.close()
+
+
+def copy_live(target):
+    """Start the build from a consistent copy of the live database, or from nothing on the first run."""
+    remove_database(target)
+    if not os.path.exists(db_path):
+        return
+    # amin.db files written in place by older runs are in WAL mode. With
+    # dashboard readers attached it can only be checkpointed, which still
+    # leaves nothing in its -wal to be replayed onto the file renamed over it.
+    if not leave_wal(db_path):
+        logging.info("%s has open readers, checkpointed it without leaving WAL mode", db_path)
+    with instrument.stage("swap.copy"):
+        source = sqlite3.connect(f"file:{db_path}?mode=ro", uri = True)
+        dest = sqlite3.connect(target)
+        try:
+            source.backup(dest)
+        finally:
+            dest.close()
+            source.close()
+
+
+@instrument.timed("swap.validate")
+def validate(target):
+    """Raise InvalidBuild unless the build is intact, complete and its derived tables agree with sales."""
+    con = sqlite3.connect(f"file:{target}?mode=ro", uri = True)
+    try:
+        check = con.execute("pragma quick_check").fetchone()[0]
+        if check != "ok":
+            raise InvalidBuild(f"quick_check: {check}")
+        if con.execute("pragma journal_mode").fetchone()[0] == "wal" or os.path.exists(f"{target}-wal"):
+            raise InvalidBuild("build was not checkpointed out of WAL mode")
+        required = [*table_query, "sales_items", rollup.TABLE, sketches.TABLE, "ingestion_meta"]
+        missing = [t for t in required if not table_columns(con, t)]
+        if missing:
+            raise InvalidBuild(f"missing tables: {', '.join(missing)}")
+        if con.execute("select value from ingestion_meta where key = 'generation'").fetchone() is None:
+            raise InvalidBuild("no generation stamp")
+        orders, last = con.execute("select count(*), date(max(event_date)) from sales where event_date is not null").fetchone()
+        if not orders:
+            raise InvalidBuild("sales is empty")
+        rolled, rolled_last = con.execute(f"select sum(orders), max(event_date) from {rollup.TABLE} where dimension = 'day'").fetchone()
+        if rolled != orders or rolled_last != last:
+            raise InvalidBuild(f"{rollup.TABLE} has {rolled} orders up to {rolled_last}, sales has {orders} up to {last}")
+        for table in ("sales_items", sketches.TABLE):
+            table_last = con.execute(f"select max(event_date) from {table}").fetchone()[0]
+            if table_last != last:
+                raise InvalidBuild(f"{table} ends on {table_last}, sales on {last}")
+    finally:
+        con.close()
+
+
+def swap(target):
+    """Rename the build over amin.db, retrying while Windows reports it open elsewhere."""
+    deadline = time.time() + swap_timeout
+    while True:
+        try:
+            os.replace(target, db_path)
+            return
+        except PermissionError:
+            if time.time() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def refresh(full=False, client=None, snapshot_format=None):
+    """One ingestion run into a copy of amin.db, validated and renamed over it.
+
+    Returns (generation, failed tables). A table that fails to load keeps its
+    previous rows in the copy, so the others are still swapped in. Raises
+    (leaving amin.db untouched) when the build does not validate, e.g. a table
+    failed on the first run and is missing altogether.
+    """
+    target = building_path()
+    with instrument.stage("refresh", full = full) as record:
+        try:
+            copy_live(target)
+            con = connect(target)
+            try:
+                jobs = [plan(con, table_name, full) for table_name in table_query]
+                failed = run_jobs(con, jobs, client)
+            finally:
+                con.close()
+            if failed:
+                logging.error("Failed tables keep their previous rows: %s", ", ".join(failed))
+            generation = stamp_generation(target)
+            # Readers open amin.db without its sidecars, so the build must be whole in one file.
+            if not leave_wal(target):
+                raise InvalidBuild(f"{target} is still in WAL mode")
+            validate(target)
+            swap(target)
+        except BaseException:
+            remove_database(target)
+            raise
+        record.update(generation = generation, failed = failed)
+    logging.info("Generation %s swapped into %s", generation, db_path)
+    if snapshot_format:
+        write_snapshot(generation, snapshot_format)
+    return generation, failed
+
+
+def refresh_with_retries(full=False, client=None, snapshot_format=None):
+    """refresh(), retried with exponential backoff; returns its result, or None once every attempt failed."""
+    for attempt in range(1, retries + 1):
+        try:
+            return refresh(full, client, snapshot_format)
+        except Exception as e:
+            if attempt == retries:
+                logging.exception("An error occured in refresh, keeping the current amin.db after %d attempts", retries)
+                return None
+            delay = min(backoff * 2 ** (attempt - 1), max_backoff)
+            logging.warning("Refresh attempt %d/%d failed: %s; retrying in %gs", attempt, retries, e, delay)
+            time.sleep(delay)
+
+
+#----------------------------------------------------------scheduler --------------------------------
+def parse_interval(text):
+    """Seconds in an interval like 900, 90s, 15m or 2h."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    text = str(text).strip().lower()
+    try:
+        seconds = float(text[:-1]) * units[text[-1]] if text[-1:] in units else float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid interval {text!r}, expected e.g. 900, 90s, 15m or 2h")
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError("the interval must be positive")
+    return seconds
+
+
+def serve(interval, full=False, client=None, snapshot_format=None, runs=None):
+    """Refresh every `interval` seconds (start to start) until interrupted, or for `runs` refreshes.
+
+    Only the first refresh honours `full`; later ones are incremental.
+    """
+    logging.info("Serving refreshes of %s every %ss", db_path, interval)
+    client = authentication(path, client)
+    count = 0
+    try:
+        while runs is None or count < runs:
+            start = time.time()
+            result = refresh_with_retries(full and count == 0, client, snapshot_format)
+            count += 1
+            if result is None:
+                logging.error("Refresh %d failed, next attempt in %ss", count, interval)
+            if runs is None or count < runs:
+                time.sleep(max(interval - (time.time() - start), 0))
+    except KeyboardInterrupt:
+        logging.info("Scheduler stopped")
 
 
 # ----------------------------------------------------main function -----------------------------------------
-def main():
+def main(full = False, client = None, snapshot_format = None):
     try:
         logging.info("Process started")
-        for table_name, query in table_query.items():
-            df = authentication(path, query)
-            if df is not None:
-                load(table_name, df)
-        logging.info("Ingestion success")
+        client = authentication(path, client)
+        result = refresh_with_retries(full, client, snapshot_format)
+        if result is None:
+            logging.error("Ingestion failed, %s was left unchanged", db_path)
+        elif result[1]:
+            logging.error("Ingestion finished, failed tables: %s", ", ".join(result[1]))
+        else:
+            logging.info("Ingestion success")
     except Exception as e:
         logging.exception("An error occured in main function")
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description = "Load the GA4 tables from BigQuery into amin.db")
+    parser.add_argument("--full-refresh", action = "store_true", help = "replace every table instead of fetching rows past the watermark")
+    parser.add_argument("--batch-size", type = int, default = batch_size, help = "rows per result page and per executemany batch")
+    parser.add_argument("--max-workers", type = int, default = max_workers, help = "tables fetched from BigQuery concurrently")
+    parser.add_argument("--snapshot", choices = sorted(snapshot.FORMATS), help = "also write a columnar snapshot of amin.db for the dashboard")
+    parser.add_argument("--serve", action = "store_true", help = "keep running and refresh amin.db every --interval")
+    parser.add_argument("--interval", type = parse_interval, default = parse_interval("15m"), help = "time between refreshes with --serve, e.g. 900, 90s, 15m or 2h")
+    parser.add_argument("--retries", type = int, default = retries, help = "attempts per refresh before keeping the current amin.db")
+    parser.add_argument("--backoff", type = float, default = backoff, help = "seconds before the first retry, doubled per attempt")
+    args = parser.parse_args()
+    batch_size = args.batch_size
+    max_workers = args.max_workers
+    retries = max(args.retries, 1)
+    backoff = args.backoff
+    if args.serve:
+        serve(args.interval, full = args.full_refresh, snapshot_format = args.snapshot)
+    else:
+        main(full = args.full_refresh, snapshot_format = args.snapshot)
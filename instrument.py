@@ -0,0 +1,113 @@
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Stage timings for ingestion, the data load and the dashboard. Wrap a block in
+#   with instrument.stage("name", table="sales") as record: ...
+# or a function in @instrument.timed("name"). Each finished stage writes one
+# JSON line (stage, seconds, RSS delta, any extra fields) to LOG_PATH. While a
+# thread is recording (one dashboard rerun), its stages are also kept in order
+# for the debug panel. Stages nest; `depth` says how deep. The log rotates at
+# LOG_MAX_BYTES, keeping LOG_BACKUPS old files.
+LOG_PATH = "timings.log"
+LOG_MAX_BYTES = 5 * 2**20
+LOG_BACKUPS = 3
+
+_local = threading.local()
+_logger = logging.getLogger("instrument")
+_logger.propagate = False
+# Set up once at import, so concurrent first stages cannot attach two handlers.
+if not _logger.handlers:
+    _handler = logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes = LOG_MAX_BYTES, backupCount = LOG_BACKUPS, delay = True)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(_handler)
+    _logger.setLevel(logging.INFO)
+
+
+def _log(record):
+    _logger.info(json.dumps(record, default = str))
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux), or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+#----------------------------------------------------------stages--------------------------------
+@contextmanager
+def stage(name, **fields):
+    """Time the block and log it as one JSON record; the yielded dict takes extra fields."""
+    record = {"stage": name, **fields}
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    rss = rss_mb()
+    started = time.time()
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record["error"] = True
+        raise
+    finally:
+        _local.depth = depth
+        after = rss_mb()
+        record.update(
+            seconds = round(time.perf_counter() - start, 6),
+            rss_delta_mb = None if rss is None else round(after - rss, 2),
+            depth = depth,
+            ts = started,
+            pid = os.getpid(),
+            thread = threading.current_thread().name,
+        )
+        _log(record)
+        records = getattr(_local, "records", None)
+        if records is not None:
+            records.append(record)
+
+
+def timed(name=None):
+    """Decorator form of stage(); the name defaults to module.function."""
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+#----------------------------------------------------------per-run recording--------------------------------
+def start_recording():
+    """Keep every stage this thread finishes from now on; returns the (growing) list."""
+    _local.records = []
+    _local.depth = 0
+    return _local.records
+
+
+def stop_recording():
+    records = getattr(_local, "records", None)
+    _local.records = None
+    return records or []
+
+
+def breakdown(records):
+    """Records of one run as a table in start order, children indented under their parents."""
+    rows = sorted(records, key = lambda r: r["ts"])
+    return pd.DataFrame({
+        "stage": ["\u2003" * r["depth"] + r["stage"] for r in rows],
+        "seconds": [r["seconds"] for r in rows],
+        "rss_delta_mb": [r["rss_delta_mb"] for r in rows],
+    })
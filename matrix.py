@@ -0,0 +1,159 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Quantity and revenue per (pincode, product, day) in sparse COO form, built
+# once per data generation. Every (pincode, product) pair that ever sold gets
+# a cell number, in pincode-then-product order, which fixes the layout of a
+# pincode x product scipy CSR matrix. Entries (cell, time bucket, sums) are
+# sorted by bucket with a pointer per bucket, so a date window is a contiguous
+# slice bincounted into the cells. Two resolutions are kept: days, and
+# Monday-starting weeks; a window takes its whole weeks from the weekly level
+# and only the ragged days at either end from the daily one. Top-N queries
+# rank the nonzero cells of each row, never the full cross product.
+Level = namedtuple("Level", ["first", "ptr", "cell", "quantity", "revenue"])
+Matrix = namedtuple("Matrix", ["pincodes", "products", "indptr", "columns", "day", "week"])
+
+
+#----------------------------------------------------------building--------------------------------
+def _codes(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(np.int64), values.cat.categories.to_numpy()
+    codes, labels = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), np.asarray(labels)
+
+
+def _week(days):
+    # Same numbering as cohorts: week w covers days 7w-3 .. 7w+3 (Monday to Sunday).
+    return (days + 3) // 7
+
+
+def _level(bucket, cell, quantity, revenue, cells):
+    """Sum entries sharing (bucket, cell); returns them sorted by bucket with bucket pointers."""
+    if len(bucket) == 0:
+        return Level(0, np.zeros(1, np.int64), np.empty(0, np.int64), np.empty(0), np.empty(0))
+    first = int(bucket.min())
+    unique, inverse = np.unique((bucket - first) * cells + cell, return_inverse=True)
+    buckets = unique // cells
+    ptr = np.searchsorted(buckets, np.arange(int(buckets[-1]) + 2))
+    return Level(first, ptr, (unique % cells).astype(np.int32), np.bincount(inverse, weights=quantity), np.bincount(inverse, weights=revenue))
+
+
+def build(items):
+    """Matrix of a line-items frame (pincode, Product_name, event_date, Quantity, Revenue)."""
+    pin, pincodes = _codes(items["pincode"])
+    prod, products = _codes(items["Product_name"])
+    dates = items["event_date"].to_numpy().astype("datetime64[D]")
+    keep = (pin >= 0) & (prod >= 0) & ~np.isnat(dates)
+    day = dates[keep].astype(np.int64)
+    pairs, cell = np.unique(pin[keep] * len(products) + prod[keep], return_inverse=True)
+    indptr = np.searchsorted(pairs // max(len(products), 1), np.arange(len(pincodes) + 1))
+    quantity = np.nan_to_num(items["Quantity"].to_numpy(np.float64)[keep])
+    revenue = np.nan_to_num(items["Revenue"].to_numpy(np.float64)[keep])
+    return Matrix(
+        pincodes, products, indptr, pairs % max(len(products), 1),
+        _level(day, cell, quantity, revenue, len(pairs)),
+        _level(_week(day), cell, quantity, revenue, len(pairs)),
+    )
+
+
+#----------------------------------------------------------windows--------------------------------
+def _slice(level, lo, hi):
+    """Entry range of buckets lo..hi (inclusive) of a level."""
+    last = len(level.ptr) - 1
+    a = min(max(lo - level.first, 0), last)
+    b = min(max(hi + 1 - level.first, 0), last)
+    return slice(level.ptr[a], level.ptr[b]) if a < b else slice(0, 0)
+
+
+def _day(value):
+    return int(np.datetime64(pd.to_datetime(value).date(), "D").astype(np.int64))
+
+
+def window(matrix, start, end):
+    """(quantity, revenue) as pincode x product CSR matrices summed over [start, end].
+
+    Both share the layout of every pair that ever sold; pairs without sales
+    in the window hold explicit zeros.
+    """
+    lo, hi = _day(start), _day(end)
+    # Whole weeks inside the window: 7w-3 >= lo and 7w+3 <= hi.
+    w_lo, w_hi = -(-(lo + 3) // 7), (hi - 3) // 7
+    if w_lo <= w_hi:
+        parts = [
+            (matrix.week, _slice(matrix.week, w_lo, w_hi)),
+            (matrix.day, _slice(matrix.day, lo, 7 * w_lo - 4)),
+            (matrix.day, _slice(matrix.day, 7 * w_hi + 4, hi)),
+        ]
+    else:
+        parts = [(matrix.day, _slice(matrix.day, lo, hi))]
+    cells = len(matrix.columns)
+    shape = (len(matrix.pincodes), len(matrix.products))
+    sums = []
+    for measure in ("quantity", "revenue"):
+        data = sum(np.bincount(level.cell[s], weights=getattr(level, measure)[s], minlength=cells) for level, s in parts)
+        sums.append(sparse.csr_matrix((data, matrix.columns, matrix.indptr), shape=shape))
+    return tuple(sums)
+
+
+#----------------------------------------------------------queries--------------------------------
+def _labels(matrix, by):
+    if by == "pincode":
+        return matrix.pincodes, matrix.products, "pincode", "Product_name"
+    if by == "product":
+        return matrix.products, matrix.pincodes, "Product_name", "pincode"
+    raise ValueError(f"Unknown axis {by!r}")
+
+
+def _totals(matrix, quantity, revenue, by):
+    rows, _, label, _ = _labels(matrix, by)
+    axis = 1 if by == "pincode" else 0
+    q, r = np.asarray(quantity.sum(axis=axis)).ravel(), np.asarray(revenue.sum(axis=axis)).ravel()
+    sold = (q != 0) | (r != 0)
+    return pd.DataFrame({label: rows[sold], "Quantity": q[sold], "Revenue": r[sold]})
+
+
+def _top(matrix, quantity, revenue, by, n, measure):
+    rows, columns, label, other = _labels(matrix, by)
+    if by == "product":
+        quantity, revenue = quantity.T.tocsr(), revenue.T.tocsr()
+    # Both matrices share one layout, so their data arrays line up.
+    row = np.repeat(np.arange(quantity.shape[0]), np.diff(quantity.indptr))
+    sold = np.flatnonzero((quantity.data != 0) | (revenue.data != 0))
+    ranked = (quantity.data if measure == "Quantity" else revenue.data)[sold]
+    order = sold[np.lexsort((quantity.indices[sold], -ranked, row[sold]))]
+    # Rank within the row: position minus the row's first position in the ordering.
+    starts = np.searchsorted(row[order], row[order], side="left")
+    rank = np.arange(len(order)) - starts
+    order, rank = order[rank < n], rank[rank < n]
+    return pd.DataFrame({
+        label: rows[row[order]],
+        other: columns[quantity.indices[order]],
+        "Quantity": quantity.data[order],
+        "Revenue": revenue.data[order],
+        "rank": rank + 1,
+    })
+
+
+def totals(matrix, start, end, by="pincode"):
+    """Quantity and Revenue per pincode (or per product) with sales in [start, end]."""
+    return _totals(matrix, *window(matrix, start, end), by)
+
+
+def top(matrix, start, end, by="pincode", n=1, measure="Quantity"):
+    """The n best products of each pincode (or pincodes of each product) by `measure` over [start, end]."""
+    if measure not in ("Quantity", "Revenue"):
+        raise ValueError(f"Unknown measure {measure!r}")
+    return _top(matrix, *window(matrix, start, end), by, n, measure)
+
+
+def pincode_top(matrix, start, end):
+    """geo.place() input: per-pincode totals and the top product by quantity, from one window."""
+    quantity, revenue = window(matrix, start, end)
+    points = _totals(matrix, quantity, revenue, "pincode")
+    best = _top(matrix, quantity, revenue, "pincode", 1, "Quantity").set_index("pincode")["Product_name"]
+    points["Product_name"] = best.reindex(points["pincode"]).astype(str).to_numpy()
+    return points
@@ -0,0 +1,114 @@
+import instrument
+import query
+import rollup
+import sketches
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# The dashboard's aggregations as plain functions of the indexed daily rollup
+# and a date range, shared by the Streamlit charts and the JSON API. `cube` is
+# either the in-memory indexed rollup or a query.Engine over amin.db, which
+# runs the same sums inside SQLite. Distinct buyers and order value quantiles
+# are estimated from the daily sketches stored next to the rollup.
+MIN_CITY_ORDERS = 9
+TOP_N = 10
+
+
+#----------------------------------------------------------metrics--------------------------------
+def _query(cube, dimension, start, end):
+    if isinstance(cube, query.Engine):
+        return cube.query(dimension, start, end)
+    return rollup.query(cube, dimension, start, end)
+
+
+def _sketch(cube, dimension, kind, start, end):
+    if isinstance(cube, query.Engine):
+        return cube.sketch(dimension, kind, start, end)
+    return sketches.window(cube[sketches.TABLE], dimension, kind, start, end)
+
+
+@instrument.timed("metric:pincode_sales")
+def pincode_sales(cube, start, end):
+    """Orders and total sales per pincode, highest sales first."""
+    pin = _query(cube, "pincode", start, end).rename(columns = {"member":"pincode"})
+    return pin.sort_values(by = "subtotal", ascending = False).reset_index(drop = True)
+
+
+@instrument.timed("metric:city_aov")
+def city_aov(cube, start, end, min_orders=MIN_CITY_ORDERS, stat="mean"):
+    """Order value per city with more than `min_orders` orders, highest first.
+
+    `aov` is the mean, or with stat "median"/"p90" that quantile estimated
+    from the daily order value sketches (within sketches.DD_ALPHA).
+    """
+    city = _query(cube, "city", start, end)
+    if stat != "mean":
+        q = sketches.STATS[stat]
+        city["aov"] = city["member"].map(sketches.quantiles(_sketch(cube, "city", "dd", start, end), [q])[q])
+    city = city[city["orders"] > min_orders].rename(columns = {"member":"cleaned_city"})
+    return city.sort_values(by = "aov", ascending = False).reset_index(drop = True)
+
+
+@instrument.timed("metric:products")
+def products(cube, start, end):
+    """Quantity and revenue per product, highest revenue first."""
+    items = _query(cube, "product", start, end).rename(columns = {"member":"Product_name", "quantity":"Quantity", "revenue":"Revenue"})
+    return items[["Product_name", "Quantity", "Revenue"]].sort_values(by = "Revenue", ascending = False).reset_index(drop = True)
+
+
+@instrument.timed("metric:top_products")
+def top_products(cube, start, end, n=TOP_N):
+    """The n products with the highest quantity sold."""
+    return products(cube, start, end).sort_values(by = "Quantity", ascending = False).head(n).reset_index(drop = True)
+
+
+@instrument.timed("metric:category_revenue")
+def category_revenue(cube, start, end):
+    revcat = _query(cube, "category", start, end).rename(columns = {"member":"category", "revenue":"Revenue"})
+    revcat["Revenue"] = revcat["Revenue"].round(2)
+    return revcat[["category", "Revenue"]].sort_values(by = "Revenue", ascending = False).reset_index(drop = True)
+
+
+@instrument.timed("metric:source_revenue")
+def source_revenue(cube, start, end, n=TOP_N):
+    """The n traffic sources with the highest order subtotal."""
+    source = _query(cube, "source", start, end).rename(columns = {"member":"source_origin"})
+    return source.nlargest(n, "subtotal").reset_index(drop = True)
+
+
+def _buyers(cube, dimension, start, end):
+    orders = _query(cube, dimension, start, end)[["member", "orders", "subtotal"]]
+    buyers = sketches.distinct(_sketch(cube, dimension, "hll", start, end))
+    orders["buyers"] = orders["member"].map(buyers).fillna(0).astype("int64")
+    return orders.sort_values(by = "buyers", ascending = False).reset_index(drop = True)
+
+
+@instrument.timed("metric:city_buyers")
+def city_buyers(cube, start, end):
+    """Estimated distinct buyers per city, with its orders and subtotal."""
+    return _buyers(cube, "city", start, end).rename(columns = {"member":"cleaned_city"})
+
+
+@instrument.timed("metric:source_buyers")
+def source_buyers(cube, start, end):
+    """Estimated distinct buyers per traffic source, with its orders and subtotal."""
+    return _buyers(cube, "source", start, end).rename(columns = {"member":"source_origin"})
+
+
+@instrument.timed("metric:daily_trends")
+def daily_trends(cube, start, end):
+    days = cube.daily(start, end) if isinstance(cube, query.Engine) else rollup.daily(cube, start, end)
+    return days.reset_index()
+
+
+METRICS = {
+    "pincode_sales": pincode_sales,
+    "city_aov": city_aov,
+    "products": products,
+    "top_products": top_products,
+    "category_revenue": category_revenue,
+    "source_revenue": source_revenue,
+    "city_buyers": city_buyers,
+    "source_buyers": source_buyers,
+    "daily_trends": daily_trends,
+}
@@ -0,0 +1,66 @@
+import functools
+import json
+import os
+import numpy as np
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Each entry of the rules file maps one raw column to a normalized one:
+#   prepare   - string ops applied before matching ("lower", "strip")
+#   rules     - checked in order, first match wins; a rule matches on any of its
+#               startswith / endswith / contains patterns
+#   unmatched - keep the "prepared" or the "original" value when nothing matches
+#   missing   - value for nulls (null keeps them null)
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "normalize_rules.json")
+PREPARE = {
+    "lower": lambda s: s.str.lower(),
+    "strip": lambda s: s.str.strip(),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_rules(path=RULES_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+#----------------------------------------------------------matching--------------------------------
+def _matches(prepared, rule):
+    hit = np.zeros(len(prepared), dtype=bool)
+    if "startswith" in rule:
+        hit |= prepared.str.startswith(tuple(rule["startswith"])).to_numpy(dtype=bool)
+    if "endswith" in rule:
+        hit |= prepared.str.endswith(tuple(rule["endswith"])).to_numpy(dtype=bool)
+    for pattern in rule.get("contains", []):
+        hit |= prepared.str.contains(pattern, regex=False).to_numpy(dtype=bool)
+    return hit
+
+
+def normalize(values, spec):
+    """Apply one rules entry to a Series in a single vectorized pass.
+
+    The rules run over the distinct values only (pd.factorize), and the
+    result is mapped back to every row through the factorized codes.
+    """
+    codes, uniques = pd.factorize(values)
+    original = pd.Series(np.asarray(uniques, dtype=object))
+    prepared = original.astype(str)
+    for step in spec.get("prepare", []):
+        prepared = PREPARE[step](prepared)
+    default = prepared if spec.get("unmatched") == "prepared" else original
+    mapped = np.select(
+        [_matches(prepared, rule) for rule in spec["rules"]],
+        [rule["value"] for rule in spec["rules"]],
+        default=default.to_numpy(dtype=object),
+    ).astype(object)
+    missing = spec.get("missing")
+    result = np.append(mapped, np.nan if missing is None else missing)[codes]
+    return pd.Series(result, index=values.index, dtype=object)
+
+
+def apply_rules(df, rules=None):
+    """Add/overwrite every normalized column described by the rules file."""
+    for target, spec in (rules or load_rules()).items():
+        df[target] = normalize(df[spec["column"]], spec)
+    return df
@@ -0,0 +1,217 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+import instrument
+import rollup
+import sketches
+import transform
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Date-filtered aggregations pushed down into SQLite, so only the aggregated
+# rows leave the database. Statements are parameterised; the dimension and
+# measure names are checked against fixed lists before they reach the SQL.
+#   Engine.query / Engine.daily  -> daily_rollup, indexed on (dimension, event_date)
+#   Engine.line_items            -> sales_items, indexed on event_date
+#   Engine.sketch                -> daily_sketch, merged per member inside SQLite
+# Read-only connections are pooled per database file and reused across calls
+# and threads. Ingestion replaces amin.db by renaming a new file over it; an
+# open connection keeps reading the old file, so pooled connections are tagged
+# with the file they opened and dropped once the path points elsewhere. Idle
+# connections are closed after IDLE_TIMEOUT seconds: on Windows an open handle
+# would make that rename fail.
+DB_PATH = "amin.db"
+POOL_SIZE = 4
+IDLE_TIMEOUT = 5.0
+# Measures over sales_items rows -> SQL expression.
+ITEM_MEASURES = {
+    "lines": "count(*)",
+    "quantity": 'sum("Quantity")',
+    "revenue": 'sum("Revenue")',
+    # An order is one purchase event of one user; rw is only the extraction's dedupe number.
+    "orders": """count(distinct "user_pseudo_id" || '|' || "new_event_timestamp")""",
+}
+ITEM_GROUPS = [c for c in transform.ITEM_DTYPES if c not in ("Price", "Quantity", "Revenue", "subtotal", "rw")]
+
+
+#----------------------------------------------------------connection pool--------------------------------
+class Pool:
+    """At most `size` idle read-only connections to one database file, each kept for at most `idle_timeout` seconds."""
+
+    def __init__(self, db_path, size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT):
+        self.db_path = db_path
+        self.idle_timeout = idle_timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._timer_lock = threading.Lock()
+        self._timer = None
+
+    def _file(self):
+        stat = os.stat(self.db_path)
+        return stat.st_dev, stat.st_ino
+
+    def _connect(self):
+        con = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        con.execute("pragma query_only = 1")
+        return con
+
+    @contextmanager
+    def connection(self):
+        current = self._file()
+        while True:
+            try:
+                opened, con, _ = self._idle.get_nowait()
+            except queue.Empty:
+                # Stat before connecting: a swap in between only costs a reconnect next time.
+                opened, con = current, self._connect()
+            if opened == current:
+                break
+            con.close()
+        try:
+            yield con
+        except Exception:
+            # A connection that failed mid-query is not handed out again.
+            con.close()
+            raise
+        self._release(opened, con)
+
+    def _release(self, opened, con, since=None):
+        try:
+            self._idle.put_nowait((opened, con, time.monotonic() if since is None else since))
+        except queue.Full:
+            con.close()
+            return
+        with self._timer_lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.idle_timeout, self._expire)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _expire(self):
+        """Close the connections idle for idle_timeout; check again later while any remain."""
+        with self._timer_lock:
+            self._timer = None
+        kept = []
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - entry[2] >= self.idle_timeout:
+                entry[1].close()
+            else:
+                kept.append(entry)
+        # Put them back oldest first, so the most recently used is handed out next.
+        for opened, con, since in reversed(kept):
+            self._release(opened, con, since)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait()[1].close()
+            except queue.Empty:
+                return
+
+
+_lock = threading.Lock()
+_pools = {}
+
+
+def pool(db_path=DB_PATH):
+    with _lock:
+        if db_path not in _pools:
+            _pools[db_path] = Pool(db_path)
+        return _pools[db_path]
+
+
+def reset_pools():
+    """Close every pooled connection; a replaced amin.db is also noticed on each checkout."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for p in pools:
+        p.close()
+
+
+#----------------------------------------------------------queries--------------------------------
+def _days(start, end):
+    return str(pd.to_datetime(start).date()), str(pd.to_datetime(end).date())
+
+
+class Engine:
+    """The rollup.query/rollup.daily answers, computed inside SQLite."""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+
+    def read(self, sql, params=()):
+        with pool(self.db_path).connection() as con, instrument.stage("query.sql") as record:
+            rows = pd.read_sql(sql, con, params=params)
+            record["rows"] = len(rows)
+            return rows
+
+    def query(self, dimension, start, end):
+        """Sum the daily rows of one dimension over [start, end]; one row per member."""
+        if dimension not in rollup.ORDER_DIMENSIONS and dimension not in rollup.ITEM_DIMENSIONS:
+            raise ValueError(f"Unknown dimension {dimension!r}")
+        sums = ", ".join(f"sum({m}) as {m}" for m in rollup.MEASURES)
+        totals = self.read(
+            f"select member, {sums} from {rollup.TABLE} "
+            "where dimension = ? and event_date between ? and ? group by member order by member",
+            (dimension, *_days(start, end)),
+        )
+        totals["member"] = totals["member"].astype(str)
+        totals["aov"] = totals["subtotal"] / totals["orders"]
+        return totals
+
+    def daily(self, start, end):
+        """Per-day orders/subtotal/quantity/revenue over [start, end]."""
+        sums = ", ".join(f"sum({m}) as {m}" for m in rollup.MEASURES)
+        days = self.read(
+            f"select event_date, {sums} from {rollup.TABLE} "
+            "where dimension = 'day' and event_date between ? and ? group by event_date order by event_date",
+            _days(start, end),
+        )
+        days["event_date"] = pd.to_datetime(days["event_date"])
+        return days.set_index("event_date")[rollup.MEASURES]
+
+    def sketch(self, dimension, kind, start, end):
+        """One dimension's `kind` sketch over [start, end], merged across the days (max for hll, sum for dd)."""
+        if dimension not in sketches.DIMENSIONS or kind not in ("hll", "dd"):
+            raise ValueError(f"Unknown sketch {dimension!r}/{kind!r}")
+        merge = "max" if kind == "hll" else "sum"
+        return self.read(
+            f"select member, slot, {merge}(value) as value from {sketches.TABLE} "
+            "where dimension = ? and kind = ? and event_date between ? and ? group by member, slot",
+            (dimension, kind, *_days(start, end)),
+        )
+
+    def line_items(self, group_by, start, end, measures=("quantity", "revenue")):
+        """Aggregate sales_items over [start, end] by any of its text/key columns."""
+        if group_by not in ITEM_GROUPS:
+            raise ValueError(f"Unknown group-by column {group_by!r}")
+        unknown = [m for m in measures if m not in ITEM_MEASURES]
+        if unknown:
+            raise ValueError(f"Unknown measures {unknown}")
+        select = ", ".join(f"{ITEM_MEASURES[m]} as {m}" for m in measures)
+        return self.read(
+            f'select "{group_by}", {select} from sales_items '
+            f'where event_date between ? and ? group by "{group_by}" order by "{group_by}"',
+            _days(start, end),
+        )
+
+    def has_tables(self, *tables):
+        """True when every one of `tables` exists in the database."""
+        marks = ", ".join("?" for _ in tables)
+        found = self.read(f"select count(*) as n from sqlite_master where type = 'table' and name in ({marks})", tables)
+        return int(found["n"].iloc[0]) == len(set(tables))
+
+    def date_range(self):
+        """First and last day in the rollup, as Timestamps (None when it is empty)."""
+        first, last = self.read(f"select min(event_date) as first, max(event_date) as last from {rollup.TABLE} where dimension = 'day'").iloc[0]
+        if first is None:
+            return None
+        return pd.to_datetime(first), pd.to_datetime(last)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Daily rollups answer any date range by summing one row per (day, member)
+# instead of rescanning orders. Measures are kept as sums and counts so they
+# stay additive across days; averages are derived after summing.
+TABLE = "daily_rollup"
+# dimension -> grouping column; "day" rolls every order of a day into one member.
+ORDER_DIMENSIONS = {"day": None, "pincode": "pincode", "city": "cleaned_city", "source": "source_origin"}
+ITEM_DIMENSIONS = {"product": "Product_name", "category": "category"}
+MEASURES = ["orders", "subtotal", "quantity", "revenue"]
+ROLLUP_DTYPES = {
+    "event_date": "TEXT",
+    "dimension": "TEXT",
+    "member": "TEXT",
+    "orders": "INTEGER",
+    "subtotal": "REAL",
+    "quantity": "REAL",
+    "revenue": "REAL",
+}
+ROLLUP_INDEX = ["dimension", "event_date"]
+
+
+#----------------------------------------------------------building--------------------------------
+def _group(frame, column):
+    keys = [frame["event_date"]]
+    if column is None:
+        keys.append(pd.Series("all", index=frame.index, name="member"))
+    else:
+        keys.append(frame[column].rename("member"))
+    return frame.groupby(keys, observed=True, dropna=True)
+
+
+def build_rollup(sales, items):
+    """Return the long (event_date, dimension, member) rollup for cleaned sales and their items.
+
+    Order dimensions carry orders/subtotal from `sales` and quantity/revenue
+    from the items; item dimensions count line items in `orders` and leave
+    subtotal empty since it is an order-level amount.
+    """
+    parts = []
+    for dimension, column in ORDER_DIMENSIONS.items():
+        orders = _group(sales, column)["subtotal"].agg(orders="size", subtotal="sum")
+        amounts = _group(items, column)[["Quantity", "Revenue"]].sum()
+        part = orders.join(amounts.rename(columns={"Quantity": "quantity", "Revenue": "revenue"}), how="left")
+        parts.append(part.fillna({"quantity": 0, "revenue": 0}).assign(dimension=dimension))
+    for dimension, column in ITEM_DIMENSIONS.items():
+        grouped = _group(items, column)
+        part = grouped["Quantity"].agg(orders="size", quantity="sum").join(grouped["Revenue"].sum().rename("revenue"))
+        parts.append(part.assign(dimension=dimension, subtotal=np.nan))
+    rollup = pd.concat(parts).reset_index()
+    rollup["member"] = rollup["member"].astype(str)
+    return rollup[["event_date", "dimension", "member"] + MEASURES]
+
+
+#----------------------------------------------------------querying--------------------------------
+def index_rollup(rollup):
+    """Split a rollup frame per dimension, sorted by day, ready for range slicing."""
+    rollup = rollup.assign(event_date=pd.to_datetime(rollup["event_date"]))
+    indexed = {
+        dimension: part.sort_values("event_date").reset_index(drop=True)
+        for dimension, part in rollup.groupby("dimension")
+    }
+    # A dimension with no rows at all (e.g. no categorised products) still answers queries, with nothing.
+    for dimension in list(ORDER_DIMENSIONS) + list(ITEM_DIMENSIONS):
+        indexed.setdefault(dimension, rollup.iloc[:0])
+    return indexed
+
+
+def _slice(indexed, dimension, start, end):
+    part = indexed[dimension]
+    days = part["event_date"].to_numpy()
+    lo = np.searchsorted(days, np.datetime64(pd.to_datetime(start)), side="left")
+    hi = np.searchsorted(days, np.datetime64(pd.to_datetime(end)), side="right")
+    return part.iloc[lo:hi]
+
+
+def query(indexed, dimension, start, end):
+    """Sum the daily rows of one dimension over [start, end]; one row per member."""
+    totals = _slice(indexed, dimension, start, end).groupby("member", observed=True)[MEASURES].sum(min_count=1).reset_index()
+    # Plain strings: plotly express would otherwise order bars by category, not by value.
+    totals["member"] = totals["member"].astype(str)
+    totals["aov"] = totals["subtotal"] / totals["orders"]
+    return totals
+
+
+def daily(indexed, start, end):
+    """Per-day orders/subtotal/quantity/revenue over [start, end]."""
+    return _slice(indexed, "day", start, end).set_index("event_date")[MEASURES]
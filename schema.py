@@ -0,0 +1,47 @@
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Load-time dtypes for the shared frames. Low-cardinality strings become
+# categoricals, numbers are downcast, dates are parsed once. Columns not
+# listed keep the dtype they were read with.
+CATEGORICAL = [
+    "user_pseudo_id", "pincode", "cleaned_city", "source_name", "source_medium",
+    "source_origin", "Product_name", "Item_variant", "category", "member",
+]
+DATETIME = ["event_date"]
+FLOAT = ["subtotal", "Price", "Quantity", "Revenue", "quantity", "revenue"]
+INTEGER = ["rw", "product_no", "orders"]
+
+
+#----------------------------------------------------------conversion--------------------------------
+def compact(df):
+    """Return df with the schema applied, plus its per-column memory report."""
+    before = df.memory_usage(index=False, deep=True)
+    out = {}
+    for column in df.columns:
+        values = df[column]
+        if column in DATETIME:
+            values = pd.to_datetime(values)
+        elif column in CATEGORICAL:
+            values = values.astype("category")
+        elif column in FLOAT:
+            values = pd.to_numeric(values, downcast="float")
+        elif column in INTEGER and values.notna().all():
+            values = pd.to_numeric(values, downcast="integer")
+        out[column] = values
+    compacted = pd.DataFrame(out, index=df.index)
+    after = compacted.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        "dtype": compacted.dtypes.astype(str),
+        "before_bytes": before,
+        "after_bytes": after,
+    })
+    report["saved_bytes"] = report["before_bytes"] - report["after_bytes"]
+    return compacted, report.rename_axis("column").reset_index()
+
+
+def memory_report(reports):
+    """Stack {frame name: compact() report} into one table sorted by bytes saved."""
+    stacked = pd.concat([report.assign(frame=name) for name, report in reports.items()], ignore_index=True)
+    return stacked[["frame", "column", "dtype", "before_bytes", "after_bytes", "saved_bytes"]].sort_values("saved_bytes", ascending=False)
@@ -0,0 +1,48 @@
+import time
+from collections import namedtuple
+import streamlit as st
+import instrument
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Dashboard sections render inside expanders that rerun the script when
+# toggled, so a collapsed section costs one expander header and none of its
+# queries or figures. Each run times its sections and how long it took to get
+# the first one on screen.
+Section = namedtuple("Section", ["key", "title", "render", "expanded"])
+
+
+class Sections:
+    """Sections of one script run, in page order."""
+
+    def __init__(self, started):
+        self.started = started
+        self.registered = []
+        self.timings = {}
+        self.first_chart = None
+
+    def section(self, key, title, expanded=False):
+        """Register the decorated function as a section and render it in place if it is open."""
+        def register(render):
+            self.registered.append(Section(key, title, render, expanded))
+            self._render(self.registered[-1])
+            return render
+        return register
+
+    def _render(self, section):
+        box = st.expander(section.title, expanded=section.expanded, key=f"section_{section.key}", on_change="rerun")
+        # open is None until the expander has been toggled in this session.
+        is_open = section.expanded if box.open is None else box.open
+        if not is_open:
+            return
+        start = time.perf_counter()
+        with box, instrument.stage(f"section:{section.key}"):
+            section.render()
+        self.timings[section.key] = time.perf_counter() - start
+        if self.first_chart is None:
+            self.first_chart = time.perf_counter() - self.started
+
+    def summary(self):
+        total = time.perf_counter() - self.started
+        first = "n/a" if self.first_chart is None else f"{self.first_chart:.2f}s"
+        return f"First section {first}, full run {total:.2f}s, {len(self.timings)}/{len(self.registered)} sections computed"
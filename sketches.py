@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Mergeable per-day sketches next to the daily rollup, for measures that do
+# not add up across days:
+#   hll  HyperLogLog registers of user_pseudo_id: slot = register, value = rank.
+#        Days merge by max; distinct buyers come within ~1.6% (2**HLL_P registers).
+#   dd   DDSketch-style log buckets of order subtotal: slot = bucket, value = count.
+#        Days merge by sum; any quantile comes within DD_ALPHA relative error.
+# Both are long (event_date, dimension, member, kind, slot, value) rows, so a
+# date range is a max/sum group-by over the days' rows, in pandas or in SQLite.
+TABLE = "daily_sketch"
+DIMENSIONS = {"day": None, "city": "cleaned_city", "source": "source_origin"}
+HLL_P = 12
+DD_ALPHA = 0.01
+# Bucket of zero and negative subtotals.
+DD_ZERO = -(2**31)
+SKETCH_DTYPES = {
+    "event_date": "TEXT",
+    "dimension": "TEXT",
+    "member": "TEXT",
+    "kind": "TEXT",
+    "slot": "INTEGER",
+    "value": "INTEGER",
+}
+SKETCH_INDEX = ["dimension", "event_date"]
+# Named quantiles offered next to the mean.
+STATS = {"median": 0.5, "p90": 0.9}
+
+_GAMMA = (1 + DD_ALPHA) / (1 - DD_ALPHA)
+_REGISTERS = 2**HLL_P
+
+
+#----------------------------------------------------------sketching--------------------------------
+def _hashes(users):
+    """64-bit hashes of user ids; a categorical column hashes each distinct id once."""
+    if isinstance(users.dtype, pd.CategoricalDtype):
+        table = pd.util.hash_array(users.cat.categories.to_numpy(dtype=object))
+        codes = users.cat.codes.to_numpy()
+        return np.where(codes >= 0, table[codes], 0), codes >= 0
+    values = users.to_numpy(dtype=object)
+    known = pd.notna(values)
+    hashes = np.zeros(len(values), dtype=np.uint64)
+    hashes[known] = pd.util.hash_array(values[known].astype(str))
+    return hashes, known
+
+
+def hll_registers(hashes):
+    """(register, rank) per hash: top HLL_P bits pick the register, rank is 1 + leading zeros of the rest."""
+    bits = 64 - HLL_P
+    register = (hashes >> np.uint64(bits)).astype(np.int64)
+    rest = (hashes & np.uint64(2**bits - 1)).astype(np.float64)
+    # frexp's exponent is the bit length; exact since rest < 2**53.
+    rank = bits + 1 - np.frexp(rest)[1]
+    return register, rank.astype(np.int64)
+
+
+def dd_buckets(values):
+    """Log bucket of each value: ceil(log_gamma(x)), DD_ZERO for x <= 0."""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        buckets = np.ceil(np.log(values) / np.log(_GAMMA))
+    return np.where(values > 0, buckets, DD_ZERO).astype(np.int64)
+
+
+def _codes(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(np.int64), values.cat.categories.astype(str)
+    codes, labels = pd.factorize(values)
+    return codes.astype(np.int64), pd.Index(labels).astype(str)
+
+
+def _reduce(day, member, slot, value, how):
+    """Combine rows sharing (day, member, slot) with np.maximum or np.add; all inputs are integer arrays."""
+    span = int(slot.max() - slot.min()) + 1 if len(slot) else 1
+    days = int(day.max() - day.min()) + 1 if len(day) else 1
+    base_day = day.min() if len(day) else 0
+    base_slot = slot.min() if len(slot) else 0
+    keys, inverse = np.unique(((member * days + (day - base_day)) * span + (slot - base_slot)), return_inverse=True)
+    combined = np.zeros(len(keys), dtype=np.int64)
+    how.at(combined, inverse, value)
+    return keys // span % days + base_day, keys // span // days, keys % span + base_slot, combined
+
+
+def build_sketches(sales):
+    """Daily hll/dd sketch rows of a cleaned sales frame, for every dimension in DIMENSIONS."""
+    hashes, known = _hashes(sales["user_pseudo_id"])
+    register, rank = hll_registers(hashes)
+    subtotal = sales["subtotal"].to_numpy(dtype=np.float64)
+    priced = ~np.isnan(subtotal)
+    bucket = dd_buckets(subtotal)
+    day = sales["event_date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    parts = []
+    for dimension, column in DIMENSIONS.items():
+        if column is None:
+            member, labels = np.zeros(len(sales), np.int64), pd.Index(["all"])
+        else:
+            member, labels = _codes(sales[column])
+        for kind, keep, slot, value, how in (
+            ("hll", known & (member >= 0), register, rank, np.maximum),
+            ("dd", priced & (member >= 0), bucket, np.ones(len(sales), np.int64), np.add),
+        ):
+            days, members, slots, values = _reduce(day[keep], member[keep], slot[keep], value[keep], how)
+            parts.append(pd.DataFrame({
+                "event_date": days.astype("datetime64[D]"),
+                "dimension": dimension,
+                "member": labels[members],
+                "kind": kind,
+                "slot": slots,
+                "value": values,
+            }))
+    return pd.concat(parts, ignore_index=True)[list(SKETCH_DTYPES)]
+
+
+#----------------------------------------------------------querying--------------------------------
+def index_sketches(sketch):
+    """Split sketch rows per (dimension, kind), sorted by day, members categorical, ready for range slicing."""
+    sketch = sketch.assign(event_date=pd.to_datetime(sketch["event_date"]))
+    indexed = {}
+    for dimension in DIMENSIONS:
+        rows = sketch[sketch["dimension"] == dimension]
+        members = rows["member"].astype(str).astype("category")
+        for kind in ("hll", "dd"):
+            part = rows.loc[rows["kind"] == kind, ["event_date", "slot", "value"]].assign(member=members)
+            indexed[(dimension, kind)] = part.sort_values("event_date", kind="stable").reset_index(drop=True)
+    return indexed
+
+
+def window(indexed, dimension, kind, start, end):
+    """The `kind` sketch rows of one dimension over [start, end]."""
+    part = indexed[(dimension, kind)]
+    days = part["event_date"].to_numpy()
+    lo = np.searchsorted(days, np.datetime64(pd.to_datetime(start)), side="left")
+    hi = np.searchsorted(days, np.datetime64(pd.to_datetime(end)), side="right")
+    return part.iloc[lo:hi]
+
+
+def _members(rows):
+    member = rows["member"]
+    if not isinstance(member.dtype, pd.CategoricalDtype):
+        member = member.astype(str).astype("category")
+    return member.cat.codes.to_numpy(np.int64), member.cat.categories.astype(str)
+
+
+def distinct(rows):
+    """Estimated distinct users per member from hll rows, merged by max over the days."""
+    codes, members = _members(rows)
+    registers = np.zeros(len(members) * _REGISTERS, dtype=np.uint8)
+    np.maximum.at(registers, codes * _REGISTERS + rows["slot"].to_numpy(np.int64), rows["value"].to_numpy().astype(np.uint8))
+    registers = registers.reshape(len(members), _REGISTERS)
+    m = float(_REGISTERS)
+    empty = (registers == 0).sum(axis=1)
+    raw = (0.7213 / (1 + 1.079 / m)) * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+    # Linear counting while registers are still empty and the raw estimate is small.
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / empty)
+    estimate = np.where((raw <= 2.5 * m) & (empty > 0), linear, raw)
+    seen = empty < m
+    return pd.Series(np.round(estimate[seen]), index=pd.Index(members[seen], name="member"), name="buyers")
+
+
+def quantiles(rows, qs):
+    """Estimated subtotal quantiles per member (columns qs) and their order count, from dd rows merged by sum."""
+    codes, members = _members(rows)
+    slot = rows["slot"].to_numpy(np.int64)
+    zero = slot == DD_ZERO
+    low = int(slot[~zero].min()) if (~zero).any() else 0
+    # Column 0 counts zero/negative subtotals, column j the bucket low + j - 1.
+    column = np.where(zero, 0, slot - low + 1)
+    span = int(column.max()) + 1 if len(column) else 1
+    counts = np.bincount(codes * span + column, weights=rows["value"].to_numpy(np.float64), minlength=len(members) * span).reshape(len(members), span)
+    cum = counts.cumsum(axis=1)
+    total = cum[:, -1]
+    estimate = {}
+    for q in qs:
+        # First column whose running count passes rank q * (n - 1).
+        bucket = (cum <= np.floor(q * (total - 1))[:, None]).sum(axis=1).clip(max=span - 1)
+        estimate[q] = np.where(bucket == 0, 0.0, 2 * _GAMMA ** (bucket + low - 1).astype(np.float64) / (_GAMMA + 1))
+    seen = total > 0
+    table = pd.DataFrame(estimate, index=pd.Index(members, name="member"))
+    return table.assign(orders=total.astype(np.int64))[seen]
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Columnar copy of amin.db for the dashboard's cold start: one dataset per table,
+# hive-partitioned by month of event_date, read back with column projection
+# through a memory-mapped filesystem.
+SNAPSHOT_DIR = "snapshot"
+MANIFEST = "manifest.json"
+FORMATS = {"parquet": "parquet", "arrow": "ipc"}
+# Only the order-level columns of `sales` are snapshotted; the item slots
+# already live, exploded, in sales_items.
+TABLES = {
+    "sales": ["user_pseudo_id", "event_date", "new_event_timestamp", "city", "pincode", "subtotal",
+              "source_name", "source_medium", "source_origin", "rw"],
+    "sales_items": None,
+    "daily_rollup": None,
+    "daily_sketch": None,
+}
+
+SQLITE_TYPES = {"INTEGER": pa.int64(), "REAL": pa.float64(), "TEXT": pa.string()}
+
+
+#----------------------------------------------------------writing--------------------------------
+def _schema(con, table, columns):
+    # Fixed from the declared SQLite types so every chunk (and every month)
+    # shares one schema, even when a chunk's column is entirely null.
+    declared = {row[1]: row[2].upper() for row in con.execute(f'pragma table_info("{table}")')}
+    names = columns or list(declared)
+    fields = [pa.field(name, SQLITE_TYPES.get(declared[name], pa.string())) for name in names]
+    return pa.schema(fields + [pa.field("month", pa.string())])
+
+
+def write_snapshot(con, generation, directory=SNAPSHOT_DIR, format="parquet", chunksize=200_000):
+    """Write TABLES from the SQLite connection as month-partitioned datasets plus a manifest.
+
+    The snapshot is built next to `directory` and renamed into place, so a
+    reader sees either the previous snapshot or the complete new one.
+    """
+    building = f"{directory}.building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+    tables = {}
+    for table, columns in TABLES.items():
+        select = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        schema = _schema(con, table, columns)
+        rows = 0
+        for part, chunk in enumerate(pd.read_sql(f"select {select} from {table}", con, chunksize=chunksize)):
+            chunk["month"] = chunk["event_date"].astype(str).str[:7]
+            ds.write_dataset(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False),
+                os.path.join(building, table),
+                format=FORMATS[format],
+                partitioning=["month"],
+                partitioning_flavor="hive",
+                basename_template=f"part-{part}-{{i}}.{format}",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            rows += len(chunk)
+        tables[table] = rows
+    with open(os.path.join(building, MANIFEST), "w") as f:
+        json.dump({"generation": generation, "format": format, "tables": tables}, f)
+    retired = f"{directory}.old"
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, retired)
+    os.replace(building, directory)
+    shutil.rmtree(retired, ignore_errors=True)
+    return tables
+
+
+#----------------------------------------------------------reading--------------------------------
+def read_manifest(directory=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def read_table(table, columns=None, directory=SNAPSHOT_DIR, manifest=None):
+    """Load one snapshot table, reading only `columns` (all when None) through mmap."""
+    manifest = manifest or read_manifest(directory)
+    dataset = ds.dataset(
+        os.path.join(os.path.abspath(directory), table),
+        format=FORMATS[manifest["format"]],
+        partitioning="hive",
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != "month"]
+    return dataset.to_table(columns=columns).to_pandas()
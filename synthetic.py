@@ -0,0 +1,111 @@
+import re
+import numpy as np
+import pandas as pd
+import categories
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Synthetic data with the same schema as the GA4-derived `sales` table, for
+# benchmarks and local runs without BigQuery access.
+CITIES = ["Bengaluru", "bangalore ", "Bangalore", "Banglore", "Chennai", "Mumbai", "Mysore", "Hyderabad", None]
+SOURCES = [
+    "(direct)", "google", "www.google.com", "instagram.com", "l.instagram.com", "m.facebook.com", "fb",
+    "bing", "yahoo", "duckduckgo", "chatgpt.com", "cdn.shopify.com", "youtube.com", "Not available", None,
+]
+VARIANTS = ["500g", "1kg", "Box", "Regular"]
+
+
+def products(path=categories.COLLECTIONS_PATH):
+    try:
+        return pd.read_csv(path)["Product"].tolist()
+    except FileNotFoundError:
+        return [f"Product {i}" for i in range(80)]
+
+
+#----------------------------------------------------------generators--------------------------------
+def synthetic_sales(n, seed=0, start="2025-01-01", end="2025-08-14"):
+    """Return n wide `sales` rows with item slots 0-4 filled left to right."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, end).strftime("%Y-%m-%d").to_numpy()
+    names = np.array(products(), dtype=object)
+    seconds = pd.to_timedelta(rng.integers(0, 86400, n), unit="s")
+    event_date = rng.choice(dates, n)
+
+    df = pd.DataFrame({
+        "user_pseudo_id": np.char.add(rng.integers(10**8, 10**9, n).astype(str), ".1700000000"),
+        "event_date": event_date,
+        "new_event_timestamp": (pd.to_datetime(event_date) + seconds).astype(str),
+        "city": rng.choice(np.array(CITIES, dtype=object), n),
+        "pincode": rng.integers(560001, 560120, n),
+        "subtotal": np.where(rng.random(n) < 0.001, np.nan, rng.gamma(2.0, 700.0, n).round()),
+    })
+    filled = rng.integers(1, 6, n)
+    for i in range(5):
+        present = filled > i
+        df[f"item_name_{i}"] = np.where(present, rng.choice(names, n), None)
+        df[f"quantity_{i}"] = np.where(present, rng.integers(1, 4, n), np.nan)
+        df[f"item_variant_{i}"] = np.where(present, rng.choice(VARIANTS, n), None)
+        df[f"price_{i}"] = np.where(present, rng.integers(100, 2500, n), np.nan)
+    df["source_name"] = rng.choice(np.array(["(direct)", "google", "ig", None], dtype=object), n)
+    df["source_medium"] = rng.choice(np.array(["organic", "cpc", "(none)", "referral"], dtype=object), n)
+    df["source_origin"] = rng.choice(np.array(SOURCES, dtype=object), n)
+    # Like production, where it is the dedupe row number and always 1.
+    df["rw"] = 1
+    return df
+
+
+#----------------------------------------------------------fake bigquery--------------------------------
+class FakeRowIterator:
+    def __init__(self, frame, page_size):
+        self.frame = frame
+        self.page_size = page_size or len(frame) or 1
+        self.total_rows = len(frame)
+
+    def to_dataframe_iterable(self):
+        for start in range(0, len(self.frame), self.page_size):
+            yield self.frame.iloc[start:start + self.page_size].reset_index(drop=True)
+
+
+class FakeQueryJob:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def result(self, page_size=None):
+        return FakeRowIterator(self.frame, page_size)
+
+    def to_dataframe(self):
+        return self.frame.copy()
+
+
+class FakeBigQueryClient:
+    """Stands in for bigquery.Client: answers ingestion's queries from in-memory frames.
+
+    tables maps a table name appearing in the query (e.g. "t_total_sales") to
+    its frame; the incremental `cast(col as string) >= @param` filter is applied.
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.queries = []
+
+    def query(self, query, job_config=None):
+        self.queries.append(query)
+        name = next(name for name in self.tables if name in query)
+        frame = self.tables[name]
+        match = re.search(r"cast\((\w+) as string\) >= @(\w+)", query)
+        if match and job_config is not None:
+            params = {p.name: p.value for p in job_config.query_parameters}
+            frame = frame[frame[match.group(1)].astype(str) >= params[match.group(2)]]
+        return FakeQueryJob(frame)
+
+
+def synthetic_first_visit(sales, seed=0):
+    rng = np.random.default_rng(seed)
+    users = sales.groupby("user_pseudo_id")["event_date"].min().reset_index()
+    lag = pd.to_timedelta(rng.integers(0, 30, len(users)), unit="D")
+    first = pd.to_datetime(users["event_date"]) - lag
+    return pd.DataFrame({
+        "user_pseudo_id": users["user_pseudo_id"],
+        "event_date": first.dt.strftime("%Y-%m-%d"),
+        "new_event_timestamp": first.astype(str),
+    })
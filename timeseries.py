@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+import numpy as np
+import pandas as pd
+import rollup
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Additive decomposition of daily subtotal over the full history, the same
+# arithmetic as statsmodels' seasonal_decompose(model="additive", period=7):
+# a centred moving-average trend, per-weekday means of the detrended series
+# (centred to sum to zero) as the seasonal, and the rest as residual.
+# The model is fitted once per data generation. When a new generation only
+# appends days (or revises the last ones), it is updated in place: only the
+# trend values whose window touches a changed day are recomputed, and the
+# weekday sums are adjusted by the difference.
+PERIOD = 7
+MEASURE = "subtotal"
+# Forecast: trend drift fitted over the last TREND_WINDOW trend values plus
+# the weekday seasonal; bands widen with the horizon from the residual spread.
+TREND_WINDOW = 28
+Z = 1.96
+
+_lock = threading.Lock()
+_model = None
+
+
+#----------------------------------------------------------decomposition--------------------------------
+def daily_series(indexed, measure=MEASURE):
+    """Full-history daily series from the rollup, with days without orders as 0."""
+    series = rollup.daily(indexed, pd.Timestamp.min, pd.Timestamp.max)[measure].astype("float64")
+    return series.asfreq("D", fill_value=0.0)
+
+
+def _trend(values, lo, hi, period=PERIOD):
+    # Centred moving average for positions [lo, hi); NaN where the window runs off either end.
+    half = period // 2
+    n = len(values)
+    if period % 2:
+        weights = np.full(period, 1.0 / period)
+    else:
+        weights = np.r_[0.5, np.ones(period - 1), 0.5] / period
+    positions = np.arange(lo, hi)
+    trend = np.full(len(positions), np.nan)
+    valid = (positions >= half) & (positions < n - half)
+    if valid.any():
+        window = np.lib.stride_tricks.sliding_window_view(values, len(weights)) @ weights
+        trend[valid] = window[positions[valid] - half]
+    return trend
+
+
+def _phase_totals(detrended, offset, period=PERIOD):
+    # Sum and count of the non-NaN detrended values per phase, phase counted from the first day.
+    phases = (np.arange(len(detrended)) + offset) % period
+    valid = ~np.isnan(detrended)
+    sums = np.bincount(phases[valid], weights=detrended[valid], minlength=period)
+    counts = np.bincount(phases[valid], minlength=period).astype(np.float64)
+    return sums, counts
+
+
+def _components(model):
+    averages = model["phase_sums"] / np.where(model["phase_counts"] > 0, model["phase_counts"], np.nan)
+    averages = averages - np.nanmean(averages)
+    seasonal = averages[np.arange(len(model["values"])) % PERIOD]
+    model["seasonal_pattern"] = averages
+    model["seasonal"] = seasonal
+    model["resid"] = model["values"] - model["trend"] - seasonal
+    return model
+
+
+def fit(series, generation=None):
+    """Decompose a regular daily series from scratch."""
+    start = time.perf_counter()
+    values = series.to_numpy(np.float64)
+    trend = _trend(values, 0, len(values))
+    sums, counts = _phase_totals(values - trend, 0)
+    model = _components({
+        "generation": generation,
+        "start": series.index[0],
+        "values": values,
+        "trend": trend,
+        "phase_sums": sums,
+        "phase_counts": counts,
+    })
+    model["fit_seconds"] = time.perf_counter() - start
+    model["update_seconds"] = None
+    model["updated_days"] = len(values)
+    return model
+
+
+def update(model, series, generation=None):
+    """Extend a fitted model to `series`, recomputing only what the changed days touch.
+
+    Falls back to a full fit when the series no longer starts on the model's
+    first day or is shorter than the model.
+    """
+    values = series.to_numpy(np.float64)
+    old = model["values"]
+    if series.index[0] != model["start"] or len(values) < len(old):
+        return fit(series, generation)
+    start = time.perf_counter()
+    differs = np.flatnonzero(values[:len(old)] != old)
+    changed = int(differs[0]) if len(differs) else len(old)
+    # The trend at i averages days i-half..i+half; the last `half` old values
+    # were NaN for lack of a right-hand window, so they are redone as well.
+    lo = max(min(changed, len(old)) - PERIOD // 2, 0)
+    sums, counts = model["phase_sums"].copy(), model["phase_counts"].copy()
+    old_sums, old_counts = _phase_totals(old[lo:] - model["trend"][lo:], lo)
+    trend = np.concatenate([model["trend"][:lo], _trend(values, lo, len(values))])
+    new_sums, new_counts = _phase_totals(values[lo:] - trend[lo:], lo)
+    updated = _components({
+        "generation": generation,
+        "start": model["start"],
+        "values": values,
+        "trend": trend,
+        "phase_sums": sums - old_sums + new_sums,
+        "phase_counts": counts - old_counts + new_counts,
+    })
+    updated["fit_seconds"] = model["fit_seconds"]
+    updated["update_seconds"] = time.perf_counter() - start
+    updated["updated_days"] = len(values) - lo
+    return updated
+
+
+def get_model(indexed, generation):
+    """Return the decomposition for the current data generation, updating the cached one."""
+    global _model
+    with _lock:
+        if _model is not None and _model["generation"] == generation:
+            return _model
+        series = daily_series(indexed)
+        if _model is None:
+            _model = fit(series, generation)
+        else:
+            _model = update(_model, series, generation)
+        logging.info("Decomposition for generation %s: fit %.4fs, update %s, %d days recomputed",
+                     generation, _model["fit_seconds"], _model["update_seconds"], _model["updated_days"])
+        return _model
+
+
+#----------------------------------------------------------slicing and forecasting--------------------------------
+def frame(model):
+    index = pd.date_range(model["start"], periods=len(model["values"]), freq="D")
+    return pd.DataFrame({
+        "observed": model["values"],
+        "trend": model["trend"],
+        "seasonal": model["seasonal"],
+        "resid": model["resid"],
+    }, index=index)
+
+
+def between(model, start, end):
+    """Decomposition rows for days in [start, end]."""
+    return frame(model).loc[pd.to_datetime(start):pd.to_datetime(end)]
+
+
+def forecast(model, horizon, window=TREND_WINDOW, z=Z):
+    """Forecast the next `horizon` days after the history with lower/upper bands."""
+    start = time.perf_counter()
+    trend = model["trend"]
+    known = np.flatnonzero(~np.isnan(trend))
+    if len(known) == 0:
+        return pd.DataFrame(columns=["forecast", "lower", "upper"]), 0.0
+    recent = known[-window:]
+    slope, intercept = np.polyfit(recent, trend[recent], 1) if len(recent) > 1 else (0.0, trend[recent[-1]])
+    n = len(model["values"])
+    steps = np.arange(n, n + horizon)
+    level = intercept + slope * steps
+    seasonal = np.nan_to_num(model["seasonal_pattern"][steps % PERIOD])
+    spread = np.nanstd(model["resid"])
+    width = z * spread * np.sqrt(1 + (steps - known[-1]) / max(len(recent), 1))
+    index = pd.date_range(model["start"] + pd.Timedelta(days=n), periods=horizon, freq="D")
+    table = pd.DataFrame({"forecast": level + seasonal}, index=index)
+    table["lower"] = table["forecast"] - width
+    table["upper"] = table["forecast"] + width
+    return table, time.perf_counter() - start
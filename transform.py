@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import categories
+import normalize
+
+
+#  -------------------------------------------------------------- configure-------------------------------------------------
+# Order-level columns carried onto every line item.
+ID_VARS = [
+    "user_pseudo_id", "event_date", "new_event_timestamp", "pincode",
+    "subtotal", "source_name", "source_medium", "source_origin",
+    "rw", "cleaned_city"
+]
+# Wide slot prefix in `sales` -> column name in the long line-item table.
+ITEM_FIELDS = {
+    "item_name": "Product_name",
+    "price": "Price",
+    "quantity": "Quantity",
+    "item_variant": "Item_variant",
+}
+SLOTS = 5
+
+
+#----------------------------------------------------------cleaning--------------------------------
+def clean_sales(df, subtotal_mean=None):
+    # subtotal_mean lets incremental loads fill gaps with the full-table mean.
+    # cleaned_city and source_origin come from the rules in normalize_rules.json.
+    df = normalize.apply_rules(df)
+    df["subtotal"] = df["subtotal"].fillna(df["subtotal"].mean() if subtotal_mean is None else subtotal_mean)
+    df.drop(columns = ["city"], inplace = True)
+    df["event_date"] = pd.to_datetime(df["event_date"])
+    return df
+
+
+#--------------------------------------wide to long line items------------------------------------
+def explode_items(df, id_vars=ID_VARS, slots=SLOTS):
+    """Turn the item_name_i/price_i/quantity_i/item_variant_i slots into one row per line item.
+
+    Each field's slot columns are stacked into an (orders, slots) array and
+    flattened row-major, so a single boolean mask drops the empty slots
+    (no item name) before any order-level column is repeated.
+    """
+    names = np.column_stack([df[f"item_name_{i}"].to_numpy(dtype=object) for i in range(slots)])
+    keep = pd.notna(names).ravel()
+    rows = np.repeat(np.arange(len(df)), slots)[keep]
+
+    items = df[id_vars].take(rows).reset_index(drop=True)
+    items["Product_name"] = names.ravel()[keep]
+    items["product_no"] = np.tile(np.arange(slots, dtype=np.int8), len(df))[keep]
+    for prefix, column in ITEM_FIELDS.items():
+        if column == "Product_name":
+            continue
+        stacked = np.column_stack([df[f"{prefix}_{i}"].to_numpy() for i in range(slots)])
+        items[column] = stacked.ravel()[keep]
+    items["Revenue"] = items["Price"] * items["Quantity"]
+    return items
+
+
+#--------------------------------------sales_items table------------------------------------
+# Column -> SQLite type for the materialized `sales_items` table.
+ITEM_DTYPES = {
+    "user_pseudo_id": "TEXT",
+    "event_date": "TEXT",
+    "new_event_timestamp": "TEXT",
+    "pincode": "INTEGER",
+    "subtotal": "REAL",
+    "source_name": "TEXT",
+    "source_medium": "TEXT",
+    "source_origin": "TEXT",
+    "rw": "INTEGER",
+    "cleaned_city": "TEXT",
+    "Product_name": "TEXT",
+    "product_no": "INTEGER",
+    "Price": "REAL",
+    "Quantity": "REAL",
+    "Item_variant": "TEXT",
+    "Revenue": "REAL",
+    "category": "TEXT",
+}
+ITEM_INDEXES = ["event_date", "pincode", "Product_name"]
+
+
+def build_items(sales):
+    """Return the line items of a cleaned `sales` frame with Revenue and category."""
+    items = explode_items(sales)
+    items["category"] = categories.categorize(items["Product_name"])
+    return items